@@ -0,0 +1,664 @@
+"""
+Batch Engine for image_batch_processor.py
+=========================================
+The details/thumbnail/watermark pipeline, usable without a display:
+- run_batch(): library entry point (the GUI is a thin client of it)
+- process_batch(): runner that can spread the work across worker processes
+- main(): headless command-line interface
+
+This module deliberately has no Tk imports: on Windows every worker process
+re-imports it (spawn start method), and it must stay cheap to load.
+
+Usage:
+    python batch_engine.py ./screenshots --details-out ./Details --thumbnail-out ./Thumbnail
+    python batch_engine.py a.png b.png --details-out ./D --thumbnail-out ./T --details-mode scale
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from image_decode import reduce_on_load
+
+
+# Reference dimensions for proportional watermark scaling.
+# The original watermark (400x200) is sized for a 1920x1200 details image.
+REFERENCE_WIDTH = 1920
+REFERENCE_HEIGHT = 1200
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.webp'}
+
+DEFAULT_WATERMARK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "watermark_app.png")
+DEFAULT_DETAILS_FOLDER = os.path.join(Path.home(), "Pictures", "Screenshots", "Details")
+DEFAULT_THUMBNAIL_FOLDER = os.path.join(Path.home(), "Pictures", "Screenshots", "Thumbnail")
+
+# Pipeline options and their defaults (same as the GUI's initial values)
+DEFAULT_OPTIONS = {
+    'details_width': 1920,
+    'details_height': 1200,
+    'details_resize_mode': 'crop',
+    'details_quality': 75,
+    'thumbnail_width': 600,
+    'thumbnail_height': 400,
+    'thumbnail_resize_mode': 'crop',
+    'thumbnail_quality': 60,
+    'watermark_opacity': 80,
+    'keep_original_size': False,
+    'reduce_on_load': True
+}
+
+RESIZE_MODES = ('crop', 'scale')
+
+# Incremental mode: per-source records, one manifest per details output folder.
+# Kept next to this script rather than in the output folders, which get uploaded.
+MANIFEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "batch_manifests")
+MANIFEST_VERSION = 1
+
+# Number of distinct (width, height, opacity) watermarks kept per process
+WATERMARK_CACHE_SIZE = 32
+
+# Watermark cache built once per worker process by _init_worker()
+_worker_watermark_cache = None
+
+
+def default_workers() -> int:
+    """Number of worker processes to use when none is specified."""
+    return os.cpu_count() or 1
+
+
+def collect_image_files(sources: List[str]) -> List[str]:
+    """
+    Expand sources into image file paths.
+
+    Each source may be a folder (its top-level images are used) or a file.
+    Files without a supported image extension are skipped.
+    """
+    image_files = []
+    for source in sources:
+        if os.path.isdir(source):
+            for file in os.listdir(source):
+                if Path(file).suffix.lower() in IMAGE_EXTENSIONS:
+                    image_files.append(os.path.join(source, file))
+        elif Path(source).suffix.lower() in IMAGE_EXTENSIONS:
+            image_files.append(source)
+    return image_files
+
+
+def make_settings(details_output_folder: str, thumbnail_output_folder: str, **options) -> Dict:
+    """
+    Build and validate a settings dict for process_batch().
+
+    Args:
+        details_output_folder: Folder for <name>.webp details images
+        thumbnail_output_folder: Folder for <name>_thumb.webp thumbnails
+        **options: Any of DEFAULT_OPTIONS; missing ones use the defaults
+
+    Raises:
+        ValueError: On unknown options or out-of-range values
+    """
+    unknown = set(options) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown option(s): {', '.join(sorted(unknown))}")
+
+    settings = dict(DEFAULT_OPTIONS)
+    settings.update(options)
+
+    for key in ('details_width', 'details_height', 'thumbnail_width', 'thumbnail_height'):
+        if int(settings[key]) <= 0:
+            raise ValueError(f"{key} must be positive, got {settings[key]}")
+        settings[key] = int(settings[key])
+    for key in ('details_quality', 'thumbnail_quality'):
+        if not 1 <= int(settings[key]) <= 100:
+            raise ValueError(f"{key} must be between 1 and 100, got {settings[key]}")
+        settings[key] = int(settings[key])
+    if not 0 <= int(settings['watermark_opacity']) <= 100:
+        raise ValueError(f"watermark_opacity must be between 0 and 100, got {settings['watermark_opacity']}")
+    settings['watermark_opacity'] = int(settings['watermark_opacity'])
+    for key in ('details_resize_mode', 'thumbnail_resize_mode'):
+        if settings[key] not in RESIZE_MODES:
+            raise ValueError(f"{key} must be one of {RESIZE_MODES}, got {settings[key]!r}")
+    settings['keep_original_size'] = bool(settings['keep_original_size'])
+    settings['reduce_on_load'] = bool(settings['reduce_on_load'])
+
+    settings['details_output_folder'] = details_output_folder
+    settings['thumbnail_output_folder'] = thumbnail_output_folder
+    return settings
+
+
+def load_watermark(watermark_path: str) -> Image.Image:
+    """Load the watermark as RGBA so its alpha channel survives compositing."""
+    return Image.open(watermark_path).convert("RGBA")
+
+
+def webp_save_options(quality: int) -> Dict:
+    """Advanced WebP encoding: method=6 (exhaustive search) + subsampling=0 (preserve color)."""
+    return {
+        'format': 'WEBP',
+        'quality': quality,
+        'optimize': True,
+        'method': 6,
+        'subsampling': 0  # Maintain color sharpness on edges and watermarks
+    }
+
+
+class WatermarkCache:
+    """
+    LRU cache of ready-to-paste RGBA watermarks.
+
+    Keyed on (details width, details height, opacity). Almost every image in a
+    batch ends up at the same details size, so the LANCZOS resize and the
+    opacity pass run once per batch instead of once per image.
+    """
+
+    def __init__(self, watermark_image: Image.Image, max_entries: int = WATERMARK_CACHE_SIZE):
+        self.watermark_image = watermark_image
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, width: int, height: int, opacity: int) -> Image.Image:
+        """Return the watermark for a width x height details image (do not modify it)."""
+        key = (width, height, opacity)
+        wm = self._entries.get(key)
+        if wm is not None:
+            self._entries.move_to_end(key)
+            return wm
+
+        wm = self._build(width, height, opacity)
+        self._entries[key] = wm
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return wm
+
+    def prewarm(self, sizes: List[Tuple[int, int]], opacity: int):
+        """Build watermarks for common details sizes ahead of the batch."""
+        for width, height in sizes:
+            self.get(width, height, opacity)
+
+    def _build(self, width: int, height: int, opacity: int) -> Image.Image:
+        watermark_image = self.watermark_image
+
+        # PROPORTIONAL WATERMARK SCALING: Scale watermark based on image size
+        # Logic: Scale down for images smaller than reference, never upscale
+        scale_factor = min(width / REFERENCE_WIDTH, height / REFERENCE_HEIGHT)
+
+        # Never upscale the watermark beyond its original size
+        scale_factor = min(scale_factor, 1.0)
+
+        # Resize watermark with LANCZOS resampling for quality
+        if scale_factor < 1.0:
+            new_wm_width = int(watermark_image.width * scale_factor)
+            new_wm_height = int(watermark_image.height * scale_factor)
+            wm = watermark_image.resize((new_wm_width, new_wm_height), Image.LANCZOS)
+            print(f"[DEBUG] Watermark scaled: {watermark_image.width}x{watermark_image.height} → {new_wm_width}x{new_wm_height} (factor: {scale_factor:.2f}) for image {width}x{height}")
+        else:
+            wm = watermark_image.copy()
+            print(f"[DEBUG] Watermark kept at original size: {wm.width}x{wm.height} for image {width}x{height}")
+
+        # Apply opacity to watermark while preserving alpha channel integrity
+        if opacity < 100:
+            alpha = wm.split()[3]  # Get alpha channel
+            # Scale alpha based on opacity percentage (256-entry lookup table, same values as per-pixel math)
+            alpha = alpha.point([int(p * opacity / 100) for p in range(256)])
+            wm.putalpha(alpha)
+
+        return wm
+
+
+def _crop_to_fit(img: Image.Image, width: int, height: int) -> Image.Image:
+    """Crop to the exact target aspect ratio (centered), then LANCZOS-resize to width x height."""
+    target_ratio = width / height
+    current_ratio = img.width / img.height
+
+    if current_ratio > target_ratio:
+        # Image is wider - crop width
+        new_width = int(img.height * target_ratio)
+        left = (img.width - new_width) // 2
+        img_cropped = img.crop((left, 0, left + new_width, img.height))
+    else:
+        # Image is taller - crop height
+        new_height = int(img.width / target_ratio)
+        top = (img.height - new_height) // 2
+        img_cropped = img.crop((0, top, img.width, top + new_height))
+
+    # Resize to exact dimensions using LANCZOS resampling
+    return img_cropped.resize((width, height), Image.LANCZOS)
+
+
+def output_paths(source_path: str, settings: Dict) -> Tuple[str, str]:
+    """(details_path, thumbnail_path) this batch writes for source_path."""
+    base_name = Path(source_path).stem
+    return (os.path.join(settings['details_output_folder'], f"{base_name}.webp"),
+            os.path.join(settings['thumbnail_output_folder'], f"{base_name}_thumb.webp"))
+
+
+def process_image(source_path: str, watermark_cache: 'WatermarkCache', settings: Dict) -> Dict:
+    """
+    Create the watermarked details image and the thumbnail for one source file.
+
+    The source is decoded once; both outputs are derived from the same RGB
+    buffer. With reduce_on_load, JPEG sources are decoded at a reduced scale
+    that still covers both target sizes (see image_decode.py); with it off,
+    output is pixel-identical to decoding the source separately for each.
+
+    Args:
+        source_path: Path to the source image
+        watermark_cache: WatermarkCache holding the batch's watermark
+        settings: Batch settings (sizes, resize modes, qualities, opacity,
+                  keep_original_size and the two output folders)
+
+    Returns:
+        Result dict with 'source', 'ok', 'details_path' and 'thumbnail_path'
+    """
+    details_width = settings['details_width']
+    details_height = settings['details_height']
+    thumbnail_width = settings['thumbnail_width']
+    thumbnail_height = settings['thumbnail_height']
+    watermark_opacity = settings['watermark_opacity']
+    details_path, thumbnail_path = output_paths(source_path, settings)
+
+    # Open image and convert to RGB with metadata stripping
+    # Strip all EXIF and metadata, convert to RGB
+    # Create new image without metadata for minimum file size
+    with Image.open(source_path) as src:
+        if settings['reduce_on_load'] and not settings['keep_original_size']:
+            # Both outputs are downscales: decode no larger than the bigger of the two targets
+            reduce_on_load(src, (max(details_width, thumbnail_width), max(details_height, thumbnail_height)))
+        img = src.convert('RGB')
+
+    # Thumbnail first: the details step below may downscale img in place
+    if settings['thumbnail_resize_mode'] == "scale":
+        # Scale to fit - resize to fit within dimensions without cropping
+        thumbnail = img.copy()
+        thumbnail.thumbnail((thumbnail_width, thumbnail_height), Image.LANCZOS)
+    else:
+        # Crop to fit - crop to exact aspect ratio then resize
+        thumbnail = _crop_to_fit(img, thumbnail_width, thumbnail_height)
+
+    # Auto-detect if image is smaller than target dimensions
+    # If image is smaller than 1920x1200, automatically keep original size to prevent stretching
+    auto_keep_original = (img.width < details_width or img.height < details_height)
+    if auto_keep_original:
+        print(f"[DEBUG] Auto-keeping original size: {img.width}x{img.height} (smaller than {details_width}x{details_height})")
+
+    # Create full image
+    if settings['keep_original_size'] or auto_keep_original:
+        # Keep original size without cropping or resizing
+        details_img = img
+    elif settings['details_resize_mode'] == "scale":
+        # Scale to fit - resize to fit within dimensions without cropping
+        # This preserves all content like Photoshop's Image Size
+        img.thumbnail((details_width, details_height), Image.LANCZOS)
+        details_img = img
+    else:
+        # Crop to fit - crop to exact aspect ratio then resize
+        details_img = _crop_to_fit(img, details_width, details_height)
+
+    # Apply watermark with transparency integrity on temporary RGBA layer
+    details_rgba = details_img.convert("RGBA")
+
+    # Ready-to-paste watermark (scaled + opacity applied), shared across the batch
+    wm = watermark_cache.get(details_img.width, details_img.height, watermark_opacity)
+
+    # Calculate watermark position dynamically for consistent placement
+    # Horizontal: center of image | Vertical: 3/4 down from top
+    wm_x = max(0, (details_img.width - wm.width) // 2)
+    wm_y = max(0, int(details_img.height * 0.75) - wm.height // 2)
+
+    # Paste watermark on RGBA layer using alpha mask for fidelity
+    details_rgba.paste(wm, (wm_x, wm_y), wm)
+
+    # Convert back to RGB for WebP encoding (maintains watermark quality)
+    details_img = details_rgba.convert("RGB")
+
+    details_img.save(details_path, **webp_save_options(settings['details_quality']))
+    print(f"[DEBUG] Saved details: {details_path} ({os.path.getsize(details_path) / 1024:.1f} KB)")
+
+    thumbnail.save(thumbnail_path, **webp_save_options(settings['thumbnail_quality']))
+    print(f"[DEBUG] Saved thumbnail: {thumbnail_path} ({os.path.getsize(thumbnail_path) / 1024:.1f} KB)")
+
+    return {
+        'source': source_path,
+        'ok': True,
+        'details_path': details_path,
+        'thumbnail_path': thumbnail_path
+    }
+
+
+def _safe_process_image(source_path: str, watermark_cache: 'WatermarkCache', settings: Dict) -> Dict:
+    """Run process_image() and turn any exception into an error result."""
+    try:
+        return process_image(source_path, watermark_cache, settings)
+    except Exception as e:
+        print(f"[ERROR] Error processing {source_path}: {str(e)}")
+        traceback.print_exc()
+        return {'source': source_path, 'ok': False, 'error': str(e)}
+
+
+def _new_watermark_cache(watermark_path: str, settings: Dict) -> 'WatermarkCache':
+    """Load the watermark and pre-warm the cache for the batch's target details size."""
+    cache = WatermarkCache(load_watermark(watermark_path))
+    cache.prewarm([(settings['details_width'], settings['details_height'])], settings['watermark_opacity'])
+    return cache
+
+
+def _init_worker(watermark_path: str, settings: Dict):
+    """Pool initializer: build the watermark cache once per worker process."""
+    global _worker_watermark_cache
+    _worker_watermark_cache = _new_watermark_cache(watermark_path, settings)
+
+
+def _process_in_worker(source_path: str, settings: Dict) -> Dict:
+    """Pool task: process one image with the worker's watermark cache."""
+    return _safe_process_image(source_path, _worker_watermark_cache, settings)
+
+
+def process_batch(image_files: List[str], watermark_path: str, settings: Dict,
+                  workers: Optional[int] = None,
+                  progress_callback: Optional[Callable[[int, int, Dict], None]] = None) -> List[Dict]:
+    """
+    Process a list of images, optionally across a pool of worker processes.
+
+    Args:
+        image_files: Source image paths
+        watermark_path: Path to the watermark PNG
+        settings: Batch settings, see process_image()
+        workers: Number of worker processes (None = all cores, 1 = in-process)
+        progress_callback: Called as (done, total, result) after every image,
+                           in completion order, from the calling thread
+
+    Returns:
+        One result dict per input file, in input order. A file that fails
+        (or whose worker dies) yields {'ok': False, 'error': ...}; the rest
+        of the batch keeps going.
+    """
+    total = len(image_files)
+    results = [None] * total
+    if workers is None:
+        workers = default_workers()
+    workers = max(1, min(workers, total)) if total else 1
+
+    # Load up front so a broken watermark fails the batch before any work starts
+    watermark_cache = _new_watermark_cache(watermark_path, settings)
+
+    if workers == 1:
+        for index, source_path in enumerate(image_files):
+            print(f"[DEBUG] Processing image {index + 1}/{total}: {os.path.basename(source_path)}")
+            results[index] = _safe_process_image(source_path, watermark_cache, settings)
+            if progress_callback:
+                progress_callback(index + 1, total, results[index])
+        return results
+
+    print(f"[DEBUG] Processing {total} images with {workers} worker processes")
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(watermark_path, settings)) as executor:
+        futures = {
+            executor.submit(_process_in_worker, source_path, settings): index
+            for index, source_path in enumerate(image_files)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Worker crashed (e.g. a decoder segfault) or the pool broke
+                print(f"[ERROR] Worker failed on {image_files[index]}: {e}")
+                result = {'source': image_files[index], 'ok': False, 'error': str(e)}
+            results[index] = result
+            done += 1
+            if progress_callback:
+                progress_callback(done, total, result)
+
+    return results
+
+
+def settings_fingerprint(settings: Dict, watermark_path: str) -> str:
+    """
+    Hash of everything that affects the output pixels: the pipeline options
+    plus the watermark file's size and mtime. Output folders are excluded.
+    """
+    wm_stat = os.stat(watermark_path)
+    fingerprint = {key: settings[key] for key in DEFAULT_OPTIONS}
+    fingerprint['watermark'] = [os.path.abspath(watermark_path), wm_stat.st_size, wm_stat.st_mtime_ns]
+    return hashlib.sha1(json.dumps(fingerprint, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def manifest_path(details_output_folder: str) -> str:
+    """Manifest file for a details output folder (named after a hash of its path)."""
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(details_output_folder)).encode('utf-8')).hexdigest()
+    return os.path.join(MANIFEST_DIR, f"{key[:16]}.json")
+
+
+def load_manifest(details_output_folder: str) -> Dict:
+    """Load the incremental manifest; a missing or unreadable one counts as empty."""
+    path = manifest_path(details_output_folder)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest.get('sources', {})
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[WARNING] Ignoring unreadable manifest {path}: {e}")
+    return {}
+
+
+def save_manifest(details_output_folder: str, sources: Dict):
+    """Write the manifest atomically so an interrupted run cannot corrupt it."""
+    path = manifest_path(details_output_folder)
+    os.makedirs(MANIFEST_DIR, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'sources': sources}, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _manifest_entry(source_path: str, fingerprint: str, result: Dict) -> Dict:
+    stat = os.stat(source_path)
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'settings': fingerprint,
+        'details_path': result['details_path'],
+        'thumbnail_path': result['thumbnail_path']
+    }
+
+
+def _is_unchanged(source_path: str, entry: Optional[Dict], fingerprint: str, settings: Dict) -> bool:
+    """
+    True when the source, the settings and both outputs match the manifest
+    entry, and the outputs are the files this run would write (so changing
+    an output folder reprocesses everything).
+    """
+    if not entry or entry.get('settings') != fingerprint:
+        return False
+    details_path, thumbnail_path = output_paths(source_path, settings)
+    if (os.path.abspath(entry['details_path']) != os.path.abspath(details_path)
+            or os.path.abspath(entry['thumbnail_path']) != os.path.abspath(thumbnail_path)):
+        return False
+    try:
+        stat = os.stat(source_path)
+    except OSError:
+        return False
+    return (stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']
+            and os.path.exists(details_path)
+            and os.path.exists(thumbnail_path))
+
+
+def run_batch(image_files: List[str], details_output_folder: str, thumbnail_output_folder: str,
+              watermark_path: str = DEFAULT_WATERMARK_PATH, workers: Optional[int] = None,
+              progress_callback: Optional[Callable[[int, int, Dict], None]] = None,
+              incremental: bool = False, **options) -> List[Dict]:
+    """
+    Library entry point: run the full pipeline over a list of images.
+
+    Args:
+        image_files: Source image paths (see collect_image_files())
+        details_output_folder: Folder for details images (created if missing)
+        thumbnail_output_folder: Folder for thumbnails (created if missing)
+        watermark_path: Path to the watermark PNG
+        workers: Number of worker processes (None = all cores, 1 = in-process)
+        progress_callback: See process_batch()
+        incremental: Skip sources whose size, mtime, settings and outputs all
+                     match the manifest (see manifest_path()), and record the
+                     processed ones in it. Without it the manifest is not touched.
+        **options: Pipeline options, see DEFAULT_OPTIONS
+
+    Returns:
+        One result dict per input file, in input order. Skipped files have
+        'skipped': True.
+    """
+    settings = make_settings(details_output_folder, thumbnail_output_folder, **options)
+
+    # Create output folders if they don't exist
+    os.makedirs(details_output_folder, exist_ok=True)
+    os.makedirs(thumbnail_output_folder, exist_ok=True)
+
+    manifest = load_manifest(details_output_folder) if incremental else {}
+    fingerprint = settings_fingerprint(settings, watermark_path) if incremental else None
+    total = len(image_files)
+    results = [None] * total
+    pending = []
+
+    for index, source_path in enumerate(image_files):
+        entry = manifest.get(os.path.abspath(source_path))
+        if incremental and _is_unchanged(source_path, entry, fingerprint, settings):
+            results[index] = {
+                'source': source_path,
+                'ok': True,
+                'skipped': True,
+                'details_path': entry['details_path'],
+                'thumbnail_path': entry['thumbnail_path']
+            }
+        else:
+            pending.append(index)
+
+    skipped_results = [r for r in results if r is not None]
+    skipped = len(skipped_results)
+    if incremental:
+        print(f"[INFO] Incremental mode: {skipped} unchanged, {len(pending)} to process")
+    if progress_callback and skipped:
+        # One update for the whole skipped set instead of one per file
+        progress_callback(skipped, total, skipped_results[-1])
+
+    def on_progress(done, _pending_total, result):
+        if progress_callback:
+            progress_callback(skipped + done, total, result)
+
+    processed = process_batch([image_files[i] for i in pending], watermark_path, settings,
+                              workers=workers, progress_callback=on_progress)
+
+    for index, result in zip(pending, processed):
+        results[index] = result
+        if incremental and result['ok']:
+            manifest[os.path.abspath(result['source'])] = _manifest_entry(result['source'], fingerprint, result)
+    if incremental:
+        save_manifest(details_output_folder, manifest)
+
+    return results
+
+
+def _parse_size(value: str) -> Tuple[int, int]:
+    """argparse type for WIDTHxHEIGHT."""
+    try:
+        width, height = (int(part) for part in value.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value!r}")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"size must be positive, got {value!r}")
+    return width, height
+
+
+def main():
+    """Command-line entry point (no display required)."""
+    d = DEFAULT_OPTIONS
+    parser = argparse.ArgumentParser(
+        description="Create watermarked WebP details images and thumbnails without the GUI"
+    )
+    parser.add_argument('sources', nargs='+', help='Source folder(s) and/or image file(s)')
+    parser.add_argument('--details-out', required=True, help='Details output folder')
+    parser.add_argument('--thumbnail-out', required=True, help='Thumbnail output folder')
+    parser.add_argument('--details-size', type=_parse_size,
+                        default=(d['details_width'], d['details_height']),
+                        help=f"Details size WIDTHxHEIGHT (default: {d['details_width']}x{d['details_height']})")
+    parser.add_argument('--thumbnail-size', type=_parse_size,
+                        default=(d['thumbnail_width'], d['thumbnail_height']),
+                        help=f"Thumbnail size WIDTHxHEIGHT (default: {d['thumbnail_width']}x{d['thumbnail_height']})")
+    parser.add_argument('--details-mode', choices=RESIZE_MODES, default=d['details_resize_mode'],
+                        help='Details resize mode (default: %(default)s)')
+    parser.add_argument('--thumbnail-mode', choices=RESIZE_MODES, default=d['thumbnail_resize_mode'],
+                        help='Thumbnail resize mode (default: %(default)s)')
+    parser.add_argument('--details-quality', type=int, default=d['details_quality'],
+                        help='Details WebP quality 1-100 (default: %(default)s)')
+    parser.add_argument('--thumbnail-quality', type=int, default=d['thumbnail_quality'],
+                        help='Thumbnail WebP quality 1-100 (default: %(default)s)')
+    parser.add_argument('--watermark', default=DEFAULT_WATERMARK_PATH,
+                        help='Watermark PNG (default: watermark_app.png next to this script)')
+    parser.add_argument('--watermark-opacity', type=int, default=d['watermark_opacity'],
+                        help='Watermark opacity 0-100 (default: %(default)s)')
+    parser.add_argument('--keep-original', action='store_true',
+                        help='Keep original size for the details image (no crop/resize)')
+    parser.add_argument('--full-decode', action='store_true',
+                        help='Always decode sources at full resolution (disables JPEG reduce-on-load)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Worker processes (default: one per CPU core; 1 = single process)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Skip sources unchanged since the last run (manifests are kept in batch_manifests/ next to this script)')
+    args = parser.parse_args()
+
+    image_files = collect_image_files(args.sources)
+    if not image_files:
+        print("[ERROR] No image files found")
+        sys.exit(1)
+
+    def on_progress(done, total, result):
+        if result.get('skipped'):
+            print(f"[INFO] {done}/{total} unchanged sources skipped")
+            return
+        status = "OK" if result['ok'] else f"FAILED ({result['error']})"
+        print(f"[INFO] {done}/{total} {os.path.basename(result['source'])}: {status}")
+
+    try:
+        results = run_batch(
+            image_files,
+            args.details_out,
+            args.thumbnail_out,
+            watermark_path=args.watermark,
+            workers=args.workers,
+            progress_callback=on_progress,
+            incremental=args.incremental,
+            details_width=args.details_size[0],
+            details_height=args.details_size[1],
+            details_resize_mode=args.details_mode,
+            details_quality=args.details_quality,
+            thumbnail_width=args.thumbnail_size[0],
+            thumbnail_height=args.thumbnail_size[1],
+            thumbnail_resize_mode=args.thumbnail_mode,
+            thumbnail_quality=args.thumbnail_quality,
+            watermark_opacity=args.watermark_opacity,
+            keep_original_size=args.keep_original,
+            reduce_on_load=not args.full_decode
+        )
+    except (ValueError, OSError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    failed = [r for r in results if not r['ok']]
+    skipped = sum(1 for r in results if r.get('skipped'))
+    print(f"[INFO] Done: {len(results) - len(failed) - skipped}/{len(results)} images processed, {skipped} skipped")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
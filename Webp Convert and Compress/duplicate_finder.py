@@ -1,8 +1,95 @@
 import os
+import time
+import queue
+import threading
+import multiprocessing
+from collections import OrderedDict
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk
-import imagehash
+import duplicate_index
+from image_decode import reduce_on_load
+
+# Minimum seconds between progress updates posted to the Tk thread
+PROGRESS_INTERVAL = 0.1
+
+# Result list is virtualized: rows have a fixed height and only the ones near the viewport exist as widgets
+ROW_HEIGHT = 390
+ROW_GAP = 16
+OVERSCAN_ROWS = 1
+
+THUMBNAIL_SIZE = (200, 200)
+THUMBNAIL_CACHE_SIZE = 200  # PhotoImages kept (~160 KB each at 200x200)
+THUMBNAIL_FAILED = "failed"
+
+
+class ThumbnailLoader:
+    """
+    Decodes thumbnails on a background thread, most recent request first,
+    and keeps the PhotoImages in a bounded LRU cache. Requests for rows that
+    were scrolled away before their turn are dropped. PhotoImages are created
+    and on_ready(path) is called on the Tk thread.
+    """
+
+    def __init__(self, root, on_ready, cache_size=THUMBNAIL_CACHE_SIZE):
+        self.root = root
+        self.on_ready = on_ready
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # path -> PhotoImage or THUMBNAIL_FAILED
+        self.wanted = set()
+        self.pending = set()
+        self.requests = queue.LifoQueue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def get(self, path):
+        """PhotoImage, THUMBNAIL_FAILED, or None if not decoded yet."""
+        photo = self.cache.get(path)
+        if photo is not None:
+            self.cache.move_to_end(path)
+        return photo
+
+    def set_wanted(self, paths):
+        """Paths needed by the rows currently materialized; queues the ones not cached."""
+        self.wanted = set(paths)
+        for path in paths:
+            if path not in self.cache and path not in self.pending:
+                self.pending.add(path)
+                self.requests.put(path)
+
+    def clear(self):
+        self.cache.clear()
+        self.wanted = set()
+
+    def _run(self):
+        while True:
+            path = self.requests.get()
+            image = None
+            failed = False
+            if path in self.wanted:
+                try:
+                    with Image.open(path) as img:
+                        reduce_on_load(img, THUMBNAIL_SIZE)
+                        img.thumbnail(THUMBNAIL_SIZE)
+                        image = img
+                except Exception:
+                    failed = True
+            self.root.after(0, lambda p=path, i=image, f=failed: self._deliver(p, i, f))
+
+    def _deliver(self, path, image, failed):
+        self.pending.discard(path)
+        if image is None and not failed:
+            return  # Skipped: no longer in view
+        photo = THUMBNAIL_FAILED
+        if not failed:
+            try:
+                photo = ImageTk.PhotoImage(image)
+            except Exception:
+                pass  # e.g. a mode Tk cannot show; the row shows "[Preview unavailable]"
+        self.cache[path] = photo
+        self.cache.move_to_end(path)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        self.on_ready(path)
 
 class DuplicateFinderGUI:
     def __init__(self, root):
@@ -11,10 +98,14 @@ class DuplicateFinderGUI:
         self.root.geometry("1000x800")
 
         # --- Variables ---
-        self.folder_path = tk.StringVar()
+        self.folder_path = tk.StringVar()  # One or more folders, separated by ';'
+        self.recursive = tk.BooleanVar(value=True)
         self.threshold = tk.IntVar(value=10)  # Default threshold for watermarks
         self.duplicate_pairs = []  # Store duplicate pairs for renaming
-        self.pair_widgets = []  # Store references to pair widgets
+        self.row_pairs = []  # Pair indices shown, in row order (removed pairs are skipped)
+        self.rows = {}  # Materialized rows: pair index -> widgets
+        self.render_pending = None
+        self.thumbnails = ThumbnailLoader(root, self.on_thumbnail_ready)
 
         # --- UI Layout ---
         # Header Frame
@@ -22,12 +113,14 @@ class DuplicateFinderGUI:
         header_frame.pack(fill='x', pady=5)
         
         # Folder Selection
-        tk.Label(header_frame, text="Step 1: Select your Image Folder", font=("Arial", 12, "bold"), bg="white").pack(pady=8)
+        tk.Label(header_frame, text="Step 1: Select your Image Folder(s)", font=("Arial", 12, "bold"), bg="white").pack(pady=8)
         folder_frame = tk.Frame(header_frame, bg="white")
         folder_frame.pack(pady=5, padx=20, fill='x')
         
         tk.Entry(folder_frame, textvariable=self.folder_path, font=("Arial", 10)).pack(side='left', expand=True, fill='x', padx=5)
-        tk.Button(folder_frame, text="Browse", command=self.browse_folder, font=("Arial", 10), height=1, width=10).pack(side='right')
+        tk.Button(folder_frame, text="Add Folder", command=self.browse_folder, font=("Arial", 10), height=1, width=10).pack(side='right')
+        tk.Checkbutton(folder_frame, text="Include subfolders", variable=self.recursive, font=("Arial", 10), bg="white").pack(side='right', padx=5)
+        tk.Label(header_frame, text="* Folders are scanned together against one shared index; separate them with ';'", font=("Arial", 9, "italic"), fg="gray", bg="white").pack()
 
         # Threshold Slider
         tk.Label(header_frame, text="Step 2: Sensitivity (Lower = Stricter)", font=("Arial", 11), bg="white").pack(pady=(8, 0))
@@ -44,52 +137,119 @@ class DuplicateFinderGUI:
         self.rename_btn = tk.Button(button_frame, text="RENAME & DELETE", bg="#FF9800", fg="white", font=("Arial", 13, "bold"), command=self.rename_all_duplicates, state="disabled", padx=20, pady=8)
         self.rename_btn.pack(side='left', padx=8)
 
+        self.status_label = tk.Label(header_frame, text="", font=("Arial", 10), fg="gray", bg="white")
+        self.status_label.pack()
+
         # Results Area
         tk.Label(header_frame, text="Results (Matches Found):", font=("Arial", 11, "bold"), bg="white").pack(pady=(8, 0))
         
-        # Scrollable results frame
+        # Scrollable results (virtualized: rows are placed directly on the canvas)
         results_container = tk.Frame(root)
         results_container.pack(expand=True, fill='both', padx=10, pady=10)
         
         # Canvas for scrolling
-        self.canvas = tk.Canvas(results_container, bg="white")
-        scrollbar = tk.Scrollbar(results_container, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = tk.Frame(self.canvas, bg="white")
-        
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
-        
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.canvas = tk.Canvas(results_container, bg="white", yscrollincrement=40)
+        self.scrollbar = tk.Scrollbar(results_container, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.bind("<Configure>", lambda e: self.refresh_rows())
         
         self.canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.scrollbar.pack(side="right", fill="y")
         
         # Mouse wheel scrolling
         self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
-
-        # Mouse wheel scrolling
-        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
     
     def _on_mousewheel(self, event):
         self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
 
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_render()
+
+    def schedule_render(self):
+        """Coalesce scroll/resize events into one render per idle cycle."""
+        if self.render_pending is None:
+            self.render_pending = self.root.after_idle(self.render_visible_rows)
+
+    def refresh_rows(self):
+        """Rebuild the row list (after a scan, removal or resize) and redraw."""
+        self.row_pairs = [i for i, pair in enumerate(self.duplicate_pairs) if pair is not None]
+        for row in self.rows.values():
+            self.canvas.delete(row['window'])
+            row['frame'].destroy()
+        self.rows = {}
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), len(self.row_pairs) * ROW_HEIGHT))
+        self.schedule_render()
+
+    def render_visible_rows(self):
+        """Materialize rows in (or just outside) the viewport and destroy the rest."""
+        self.render_pending = None
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first = max(0, int(top // ROW_HEIGHT) - OVERSCAN_ROWS)
+        last = min(len(self.row_pairs), int(bottom // ROW_HEIGHT) + 1 + OVERSCAN_ROWS)
+        visible = {self.row_pairs[row]: row for row in range(first, last)}
+
+        for pair_index in [i for i in self.rows if i not in visible]:
+            row = self.rows.pop(pair_index)
+            self.canvas.delete(row['window'])
+            row['frame'].destroy()
+        for pair_index, row in visible.items():
+            if pair_index not in self.rows:
+                self.create_pair_widget(self.duplicate_pairs[pair_index], pair_index, row)
+
+        self.thumbnails.set_wanted([
+            path for pair_index in visible
+            for path in (self.duplicate_pairs[pair_index]['path_a'], self.duplicate_pairs[pair_index]['path_b'])
+        ])
+
+    def on_thumbnail_ready(self, path):
+        """Fill in a thumbnail that finished decoding, if its row is still materialized."""
+        for row in self.rows.values():
+            label = row['thumbnails'].get(path)
+            if label is not None:
+                self.set_thumbnail(label, path)
+
+    def set_thumbnail(self, label, path):
+        photo = self.thumbnails.get(path)
+        if photo is None:
+            label.config(image="", text="Loading preview...", fg="gray")
+        elif photo == THUMBNAIL_FAILED:
+            label.config(image="", text="[Preview unavailable]", fg="gray")
+        else:
+            label.config(image=photo, text="")
+            label.image = photo  # Keep a reference
+
+    def show_message(self, text, fg, bold=False):
+        """Centered message in the (empty) results area."""
+        self.canvas.delete("message")
+        self.canvas.create_text(
+            self.canvas.winfo_width() // 2, 60, text=text, fill=fg, justify='center',
+            font=("Arial", 13, "bold") if bold else ("Arial", 13), tags="message"
+        )
+
     def browse_folder(self):
         selected = filedialog.askdirectory()
         if selected:
-            self.folder_path.set(selected)
+            roots = self.get_roots()
+            if selected not in roots:
+                self.folder_path.set(";".join(roots + [selected]))
+
+    def get_roots(self):
+        """Folders entered in the folder field"""
+        return [root.strip() for root in self.folder_path.get().split(";") if root.strip()]
     
     def clear_results(self):
         """Clear all result widgets"""
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        self.pair_widgets = []
+        self.canvas.delete("message")
+        self.duplicate_pairs = []
+        self.thumbnails.clear()
+        self.refresh_rows()
+        self.canvas.yview_moveto(0)
 
     def start_scan(self):
-        path = self.folder_path.get()
-        if not path or not os.path.exists(path):
+        roots = self.get_roots()
+        if not roots or not all(os.path.isdir(root) for root in roots):
             messagebox.showerror("Error", "Please select a valid folder first!")
             return
 
@@ -97,60 +257,77 @@ class DuplicateFinderGUI:
         self.duplicate_pairs = []  # Clear previous pairs
         self.rename_btn.config(state="disabled")
         self.scan_btn.config(text="Scanning...", state="disabled")
-        self.root.update()
+        self.status_label.config(text="Hashing images...")
+
+        # Hashing runs in a process pool driven from a worker thread, so the window stays responsive
+        limit = self.threshold.get()
+        threading.Thread(target=self.run_scan, args=(roots, limit, self.recursive.get()), daemon=True).start()
 
+    def run_scan(self, roots, limit, recursive):
+        """Worker thread: hash (cached/pooled) and cluster, then hand the pairs to the Tk thread."""
         try:
-            image_data = []
-            valid_exts = ('.jpg', '.jpeg', '.png', '.webp')
-            
-            # 1. Generate Hashes
-            for filename in os.listdir(path):
-                if filename.lower().endswith(valid_exts):
-                    img_path = os.path.join(path, filename)
-                    try:
-                        with Image.open(img_path) as img:
-                            h = imagehash.phash(img)
-                            image_data.append({'name': filename, 'hash': h, 'path': img_path})
-                    except Exception as e:
-                        print(f"Error loading {filename}: {e}")
-
-            # 2. Compare
-            found_any = False
-            already_matched = set()
-            limit = self.threshold.get()
-
-            for i in range(len(image_data)):
-                if i in already_matched: continue
-                
-                for j in range(i + 1, len(image_data)):
-                    diff = image_data[i]['hash'] - image_data[j]['hash']
-                    
-                    if diff <= limit:
-                        found_any = True
-                        already_matched.add(j)
-                        
-                        # Store the pair with full paths
-                        pair = {
-                            'file_a': image_data[i]['name'],
-                            'file_b': image_data[j]['name'],
-                            'path_a': image_data[i]['path'],
-                            'path_b': image_data[j]['path'],
-                            'distance': diff
-                        }
-                        self.duplicate_pairs.append(pair)
-                        
-                        # Create visual pair widget
-                        self.create_pair_widget(pair, len(self.duplicate_pairs) - 1)
+            last_update = [0.0]
+
+            def on_progress(done, total):
+                now = time.time()
+                if now - last_update[0] >= PROGRESS_INTERVAL or done == total:
+                    last_update[0] = now
+                    self.root.after(0, lambda: self.status_label.config(text=f"Hashed {done}/{total} images"))
+
+            # 1. Byte-identical files (no decoding), 2. hash the rest (unchanged files come
+            # from the shared index) and 3. cluster as hashes arrive
+            start_time = time.time()
+            cache = duplicate_index.HashCache()
+            try:
+                image_paths, records, clusters, exact_groups = duplicate_index.scan_roots(
+                    roots, limit, cache, recursive, progress_callback=on_progress
+                )
+            finally:
+                cache.close()
+            elapsed = time.time() - start_time
+            print(f"[INFO] Scanned {len(records)} images in {elapsed:.2f}s, {len(clusters)} duplicate groups")
+            exact_group_of = {index: n for n, group in enumerate(exact_groups) for index in group}
+
+            # One row per cluster member, paired with the cluster's representative (A)
+            pairs = []
+            for representative, *members in clusters:
+                for j in members:
+                    exact = representative in exact_group_of and exact_group_of[representative] == exact_group_of.get(j)
+                    pairs.append({
+                        'file_a': os.path.basename(image_paths[representative]),
+                        'file_b': os.path.basename(image_paths[j]),
+                        'path_a': image_paths[representative],
+                        'path_b': image_paths[j],
+                        # Identical files may not decode at all, so they have no hashes to compare
+                        'distance': 0 if exact else duplicate_index.hamming(records[representative].phash, records[j].phash),
+                        'exact': exact,
+                        'group_size': len(members) + 1
+                    })
+            self.root.after(0, lambda: self.show_results(pairs, len(records), elapsed))
+        except Exception as e:
+            error = str(e)
+            self.root.after(0, lambda: self.scan_failed(error))
+
+    def scan_failed(self, error):
+        messagebox.showerror("Error", f"An error occurred: {error}")
+        self.status_label.config(text="")
+        self.scan_btn.config(text="START SCAN", state="normal")
+
+    def show_results(self, pairs, image_count, elapsed):
+        """Tk thread: build the result widgets for a finished scan."""
+        self.status_label.config(text=f"Scanned {image_count} images in {elapsed:.1f}s")
+        try:
+            found_any = bool(pairs)
+
+            # Only the rows in view get widgets; the rest are built as they scroll in
+            self.duplicate_pairs = list(pairs)
+            self.refresh_rows()
 
             if not found_any:
-                no_results_label = tk.Label(
-                    self.scrollable_frame, 
-                    text="No duplicates found with current sensitivity.\nTry increasing the sensitivity value.",
-                    font=("Arial", 13),
-                    fg="gray",
-                    bg="white"
+                self.show_message(
+                    "No duplicates found with current sensitivity.\nTry increasing the sensitivity value.",
+                    fg="gray"
                 )
-                no_results_label.pack(pady=50)
             else:
                 self.rename_btn.config(state="normal")
                 
@@ -159,13 +336,18 @@ class DuplicateFinderGUI:
         finally:
             self.scan_btn.config(text="START SCAN", state="normal")
     
-    def create_pair_widget(self, pair, index):
-        """Create a visual widget for a duplicate pair with individual controls"""
-        pair_frame = tk.Frame(self.scrollable_frame, relief="solid", borderwidth=2, bg="#f9f9f9")
-        pair_frame.pack(fill='x', padx=15, pady=8)
+    def create_pair_widget(self, pair, index, row):
+        """Create a visual widget for a duplicate pair with individual controls, at the given row"""
+        pair_frame = tk.Frame(self.canvas, relief="solid", borderwidth=2, bg="#f9f9f9")
+        pair_frame.pack_propagate(False)
+        window = self.canvas.create_window(
+            15, row * ROW_HEIGHT + ROW_GAP // 2, window=pair_frame, anchor="nw",
+            width=max(1, self.canvas.winfo_width() - 30), height=ROW_HEIGHT - ROW_GAP
+        )
         
         # Store reference
-        self.pair_widgets.append({'frame': pair_frame, 'pair': pair, 'index': index})
+        thumbnails = {}
+        self.rows[index] = {'frame': pair_frame, 'window': window, 'thumbnails': thumbnails}
         
         # Header with distance info
         header_frame = tk.Frame(pair_frame, bg="#e3e3e3")
@@ -173,7 +355,8 @@ class DuplicateFinderGUI:
         
         tk.Label(
             header_frame, 
-            text=f"[MATCH] Dist: {pair['distance']}", 
+            text=("[EXACT] Identical files" if pair.get('exact') else f"[MATCH] Dist: {pair['distance']}")
+                 + (f"  (group of {pair['group_size']})" if pair.get('group_size', 2) > 2 else ""), 
             font=("Arial", 12, "bold"),
             bg="#e3e3e3"
         ).pack(side='left', padx=15, pady=8)
@@ -189,23 +372,18 @@ class DuplicateFinderGUI:
         tk.Label(file_a_frame, text="A:", font=("Arial", 11, "bold"), bg="#f9f9f9").pack(anchor='w')
         tk.Label(
             file_a_frame, 
-            text=pair['file_a'], 
+            text=pair['path_a'], 
             font=("Courier", 9),
             bg="#f9f9f9",
             wraplength=400,
             justify='left'
         ).pack(anchor='w', pady=5)
         
-        # Thumbnail for A
-        try:
-            img_a = Image.open(pair['path_a'])
-            img_a.thumbnail((200, 200))
-            photo_a = ImageTk.PhotoImage(img_a)
-            label_a = tk.Label(file_a_frame, image=photo_a, bg="#f9f9f9", relief="solid", borderwidth=2)
-            label_a.image = photo_a  # Keep a reference
-            label_a.pack(pady=8)
-        except:
-            tk.Label(file_a_frame, text="[Preview unavailable]", font=("Arial", 10), fg="gray", bg="#f9f9f9").pack(pady=8)
+        # Thumbnail for A (decoded in the background; filled in by on_thumbnail_ready)
+        label_a = tk.Label(file_a_frame, font=("Arial", 10), bg="#f9f9f9", relief="solid", borderwidth=2)
+        label_a.pack(pady=8)
+        thumbnails[pair['path_a']] = label_a
+        self.set_thumbnail(label_a, pair['path_a'])
         
         # File B column
         file_b_frame = tk.Frame(content_frame, bg="#f9f9f9")
@@ -214,7 +392,7 @@ class DuplicateFinderGUI:
         tk.Label(file_b_frame, text="B:", font=("Arial", 11, "bold"), bg="#f9f9f9").pack(anchor='w')
         tk.Label(
             file_b_frame, 
-            text=pair['file_b'], 
+            text=pair['path_b'], 
             font=("Courier", 9),
             bg="#f9f9f9",
             wraplength=400,
@@ -222,15 +400,10 @@ class DuplicateFinderGUI:
         ).pack(anchor='w', pady=5)
         
         # Thumbnail for B
-        try:
-            img_b = Image.open(pair['path_b'])
-            img_b.thumbnail((200, 200))
-            photo_b = ImageTk.PhotoImage(img_b)
-            label_b = tk.Label(file_b_frame, image=photo_b, bg="#f9f9f9", relief="solid", borderwidth=2)
-            label_b.image = photo_b  # Keep a reference
-            label_b.pack(pady=8)
-        except:
-            tk.Label(file_b_frame, text="[Preview unavailable]", font=("Arial", 10), fg="gray", bg="#f9f9f9").pack(pady=8)
+        label_b = tk.Label(file_b_frame, font=("Arial", 10), bg="#f9f9f9", relief="solid", borderwidth=2)
+        label_b.pack(pady=8)
+        thumbnails[pair['path_b']] = label_b
+        self.set_thumbnail(label_b, pair['path_b'])
         
         # Action buttons frame
         action_frame = tk.Frame(pair_frame, bg="#f9f9f9")
@@ -261,17 +434,19 @@ class DuplicateFinderGUI:
         )
         btn_delete_b.pack(side='left', padx=6)
         
-        btn_rename = tk.Button(
-            action_frame, 
-            text="Rename & Delete", 
-            bg="#FF9800", 
-            fg="white",
-            font=("Arial", 10, "bold"),
-            padx=15,
-            pady=6,
-            command=lambda: self.rename_single_pair(index)
-        )
-        btn_rename.pack(side='left', padx=6)
+        # Renaming only makes sense within one folder; across folders "Delete B" is the action
+        if self.same_folder(pair):
+            btn_rename = tk.Button(
+                action_frame, 
+                text="Rename & Delete", 
+                bg="#FF9800", 
+                fg="white",
+                font=("Arial", 10, "bold"),
+                padx=15,
+                pady=6,
+                command=lambda: self.rename_single_pair(index)
+            )
+            btn_rename.pack(side='left', padx=6)
         
         btn_keep_both = tk.Button(
             action_frame, 
@@ -293,14 +468,13 @@ class DuplicateFinderGUI:
             return
         
         pair = self.duplicate_pairs[pair_index]
-        path = self.folder_path.get()
         
         if file_choice == 'A':
             file_to_delete = pair['file_a']
-            file_path = os.path.join(path, file_to_delete)
+            file_path = pair['path_a']
         else:
             file_to_delete = pair['file_b']
-            file_path = os.path.join(path, file_to_delete)
+            file_path = pair['path_b']
         
         # Confirm deletion
         result = messagebox.askyesno(
@@ -324,59 +498,37 @@ class DuplicateFinderGUI:
             messagebox.showerror("Error", f"Failed to delete file:\n{str(e)}")
     
     def rename_single_pair(self, pair_index):
-        """Rename complex filename to simple one and delete original"""
+        """Keep A (the representative) under the simpler name and delete B"""
         if pair_index >= len(self.duplicate_pairs):
             return
         
         pair = self.duplicate_pairs[pair_index]
-        path = self.folder_path.get()
-        
-        file_a = pair['file_a']
-        file_b = pair['file_b']
-        
-        # Determine which is simpler
-        if self.is_simpler_name(file_a, file_b):
-            simple_name = file_a
-            complex_name = file_b
-        else:
-            simple_name = file_b
-            complex_name = file_a
-        
-        simple_path = os.path.join(path, simple_name)
-        complex_path = os.path.join(path, complex_name)
+        new_path = self.plan_pair(pair)
         
         # Confirm action
-        result = messagebox.askyesno(
-            "Confirm Rename & Delete",
-            f"This will:\n\n"
-            f"• Delete: {simple_name}\n"
-            f"• Rename: {complex_name}\n"
-            f"     to: {simple_name}\n\n"
-            f"Continue?"
-        )
-        
-        if not result:
+        if new_path:
+            message = (f"This will:\n\n"
+                       f"• Delete: {pair['file_b']}\n"
+                       f"• Rename: {pair['file_a']}\n"
+                       f"     to: {pair['file_b']}\n\n"
+                       f"Continue?")
+        else:
+            message = (f"This will:\n\n"
+                       f"• Keep: {pair['file_a']}\n"
+                       f"• Delete: {pair['file_b']}\n\n"
+                       f"Continue?")
+        if not messagebox.askyesno("Confirm Rename & Delete", message):
             return
         
         try:
-            # Check if both files still exist
-            if not os.path.exists(simple_path):
-                messagebox.showerror("Error", f"File not found: {simple_name}")
-                return
-            if not os.path.exists(complex_path):
-                messagebox.showerror("Error", f"File not found: {complex_name}")
-                return
-            
-            # Delete the simple-named file
-            os.remove(simple_path)
-            
-            # Rename complex file to simple name
-            os.rename(complex_path, simple_path)
-            
-            messagebox.showinfo(
-                "Success", 
-                f"✓ Renamed {complex_name}\n     to {simple_name}\n\n✓ Deleted original {simple_name}"
-            )
+            self.resolve_pair(pair)
+            if new_path:
+                messagebox.showinfo(
+                    "Success", 
+                    f"✓ Renamed {pair['file_a']}\n     to {pair['file_b']}\n\n✓ Deleted original {pair['file_b']}"
+                )
+            else:
+                messagebox.showinfo("Success", f"✓ Kept {pair['file_a']}\n\n✓ Deleted {pair['file_b']}")
             
             # Remove this pair from display
             self.remove_pair_widget(pair_index)
@@ -384,6 +536,45 @@ class DuplicateFinderGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to process pair:\n{str(e)}")
     
+    def same_folder(self, pair):
+        """True when both files of a pair are in the same directory"""
+        return (os.path.normcase(os.path.dirname(os.path.abspath(pair['path_a'])))
+                == os.path.normcase(os.path.dirname(os.path.abspath(pair['path_b']))))
+    
+    def plan_pair(self, pair):
+        """
+        What "Rename & Delete" does with a pair. A, the cluster's representative,
+        is always the file kept and B is deleted. A only takes over B's name
+        when both are in the same folder and B's name is the simpler one.
+        
+        Returns:
+            The path A is renamed to, or None to leave A where it is
+        """
+        if self.same_folder(pair) and not self.is_simpler_name(pair['file_a'], pair['file_b']):
+            return pair['path_b']
+        return None
+    
+    def resolve_pair(self, pair):
+        """Carry out plan_pair(); raises if either file is gone or the file operation fails"""
+        for path in (pair['path_a'], pair['path_b']):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"File not found: {path}")
+        
+        new_path = self.plan_pair(pair)
+        if new_path:
+            # One replace within the folder: B is never gone before A has its name
+            os.replace(pair['path_a'], new_path)
+            self.representative_moved(pair['path_a'], new_path)
+        else:
+            os.remove(pair['path_b'])
+    
+    def representative_moved(self, old_path, new_path):
+        """Point the other pairs of the representative's cluster at its new name"""
+        for pair in self.duplicate_pairs:
+            if pair is not None and pair['path_a'] == old_path:
+                pair['path_a'] = new_path
+                pair['file_a'] = os.path.basename(new_path)
+    
     def keep_both_files(self, pair_index):
         """Keep both files and remove from duplicate list"""
         if pair_index >= len(self.duplicate_pairs):
@@ -398,28 +589,19 @@ class DuplicateFinderGUI:
             self.remove_pair_widget(pair_index)
             messagebox.showinfo("Info", "Pair removed from list. Both files kept.")
     
-    def remove_pair_widget(self, pair_index):
-        """Remove a pair widget from display"""
-        if pair_index < len(self.pair_widgets):
-            widget_info = self.pair_widgets[pair_index]
-            widget_info['frame'].destroy()
-            
+    def remove_pair_widget(self, pair_index, refresh=True):
+        """Remove a pair from display (refresh=False defers the redraw during bulk removal)"""
+        if pair_index < len(self.duplicate_pairs) and self.duplicate_pairs[pair_index] is not None:
             # Mark as removed (don't actually remove from list to keep indices stable)
             self.duplicate_pairs[pair_index] = None
-            self.pair_widgets[pair_index] = None
+            if refresh:
+                self.refresh_rows()
             
             # Check if any pairs remain
             remaining = sum(1 for p in self.duplicate_pairs if p is not None)
             if remaining == 0:
                 self.rename_btn.config(state="disabled")
-                no_results_label = tk.Label(
-                    self.scrollable_frame, 
-                    text="All duplicates have been processed!",
-                    font=("Arial", 13, "bold"),
-                    fg="green",
-                    bg="white"
-                )
-                no_results_label.pack(pady=30)
+                self.show_message("All duplicates have been processed!", fg="green", bold=True)
     
     def is_simpler_name(self, name1, name2):
         """Determine which filename is simpler (shorter, less complex)"""
@@ -440,7 +622,7 @@ class DuplicateFinderGUI:
         return len(base1) <= len(base2)
     
     def rename_all_duplicates(self):
-        """Rename all remaining complex filenames to simple ones and delete originals"""
+        """Keep every representative (under the simpler name within a folder) and delete the other files"""
         # Filter out already processed pairs
         remaining_pairs = [p for p in self.duplicate_pairs if p is not None]
         
@@ -448,17 +630,12 @@ class DuplicateFinderGUI:
             messagebox.showinfo("Info", "No duplicates to process!")
             return
         
-        path = self.folder_path.get()
-        if not path or not os.path.exists(path):
-            messagebox.showerror("Error", "Folder path is invalid!")
-            return
-        
         # Confirm action
         result = messagebox.askyesno(
             "Confirm Bulk Action",
             f"This will process {len(remaining_pairs)} duplicate pair(s):\n\n"
-            "• Complex filenames will be renamed to simpler ones\n"
-            "• Original simple-named files will be deleted\n\n"
+            "• The A file (best copy) of each pair is kept, the B file is deleted\n"
+            "• If both are in the same folder, A takes B's name when it is simpler\n\n"
             "Do you want to continue?"
         )
         
@@ -474,40 +651,19 @@ class DuplicateFinderGUI:
                 if pair is None:  # Already processed
                     continue
                 
-                file_a = pair['file_a']
-                file_b = pair['file_b']
-                
-                # Determine which is simpler
-                if self.is_simpler_name(file_a, file_b):
-                    simple_name = file_a
-                    complex_name = file_b
-                else:
-                    simple_name = file_b
-                    complex_name = file_a
-                
-                simple_path = os.path.join(path, simple_name)
-                complex_path = os.path.join(path, complex_name)
-                
-                # Check if both files still exist
-                if not os.path.exists(simple_path) or not os.path.exists(complex_path):
-                    error_log.append(f"File not found: {simple_name} or {complex_name}")
-                    continue
-                
                 try:
-                    # Delete the simple-named file
-                    os.remove(simple_path)
-                    
-                    # Rename complex file to simple name
-                    os.rename(complex_path, simple_path)
+                    self.resolve_pair(pair)
                     
                     success_count += 1
                     
-                    # Remove from display
-                    self.remove_pair_widget(i)
+                    # Remove from display (redrawn once after the loop)
+                    self.remove_pair_widget(i, refresh=False)
                     
                 except Exception as e:
-                    error_log.append(f"Error processing {complex_name} → {simple_name}: {str(e)}")
+                    error_log.append(f"Error processing {pair['file_a']} / {pair['file_b']}: {str(e)}")
             
+            self.refresh_rows()
+
             # Show results
             result_msg = f"✓ Successfully processed {success_count} pair(s)"
             if error_log:
@@ -523,6 +679,7 @@ class DuplicateFinderGUI:
             messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Hashing pool in frozen (PyInstaller) builds
     root = tk.Tk()
     app = DuplicateFinderGUI(root)
     root.mainloop()
\ No newline at end of file
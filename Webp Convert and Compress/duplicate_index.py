@@ -0,0 +1,653 @@
+"""
+Near-Duplicate Index for duplicate_finder.py
+============================================
+Each image is decoded once and four hashes are taken from it: pHash, dHash
+and wHash (64 bits each) and a colour hash (42 bits), all packed into
+integers and kept in an (n, 4) NumPy array.
+
+Candidates are found on pHash with a vectorised XOR + popcount over blocks
+of rows, and a candidate becomes a link only if dHash or wHash agrees and
+the colour hash is close. Links are merged with union-find into clusters
+(connected components), so a group of near-duplicates comes out as one
+cluster whatever the file order, with the highest-resolution file as its
+representative. Memory is linear in the number of images: the hash array,
+one parent slot per image, and one comparison block at a time.
+
+Byte-identical files are found first, without decoding anything: files are
+grouped by size, then by a digest of their first and last 64 KB, then by a
+full content digest. Only one file per identical group is decoded.
+
+Hashes are cached on disk (SQLite) keyed by path, size and mtime, so a
+rescan only decodes new or modified files. Those are hashed in a process
+pool with reduce-on-load decoding (no hash looks at more than 64 px), and
+each image is linked against the ones already seen as soon as it arrives,
+so comparison overlaps with hashing.
+
+The cache is one shared index for every folder ever scanned: roots are
+walked recursively, a new root only hashes its new files, and files that
+disappeared under a rescanned root are pruned. HashIndex loads it into
+memory once, after which "what in the index looks like this image?" is a
+single vectorised pass (milliseconds for 100k images).
+
+No Tk imports, so the scan logic can be used (and timed) headless:
+    python duplicate_index.py ROOT [ROOT ...] [-t 10] [--no-recursive]
+    python duplicate_index.py --query IMAGE [--query IMAGE ...]
+"""
+
+import os
+import time
+import argparse
+import hashlib
+import multiprocessing
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import imagehash
+import numpy as np
+from PIL import Image
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+# Cells (row x column hash comparisons) evaluated per NumPy block
+BLOCK_CELLS = 4_000_000
+
+# Hashes taken from each decode, in column order of the hash array
+HASH_KINDS = ('phash', 'dhash', 'whash', 'colorhash')
+
+# JPEGs are DCT-decoded at no less than this; the image is then shrunk to HASH_WORK_SIZE
+# (pHash looks at 32x32, wHash at 64x64, dHash at 9x8; colour hash only at proportions)
+HASH_DECODE_SIZE = (64, 64)
+HASH_WORK_SIZE = (128, 128)
+
+# Colour hash: 14 bins x 3 bits; a link needs the colour hashes within COLOR_THRESHOLD bits
+COLORHASH_BINBITS = 3
+COLOR_THRESHOLD = 6
+
+# Files per pool task (a reduced decode is only a few ms, so single files are dominated by IPC)
+HASH_CHUNK = 16
+
+# Below this many files to hash, a pool costs more to start than it saves
+MIN_POOL_FILES = 64
+
+# Images buffered before they are linked against the index
+MATCH_BATCH = 256
+
+# Bytes read from each end of a file for the partial (second-stage) digest
+PARTIAL_HASH_BYTES = 64 * 1024
+
+# Read size for full-content digests
+DIGEST_CHUNK = 1024 * 1024
+
+# Persistent hash cache, next to the script like the other tools' config files
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phash_cache.sqlite")
+
+# Cache schema version (PRAGMA user_version); 2 = multi-hash 'images' table
+CACHE_SCHEMA_VERSION = 2
+
+
+class HashRecord(NamedTuple):
+    """Everything kept per image: packed hashes plus original dimensions."""
+    phash: int
+    dhash: int
+    whash: int
+    colorhash: int
+    width: int
+    height: int
+
+# Popcount of every byte value, for NumPy builds without bitwise_count
+_POPCOUNT_8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def pack_hash(image_hash) -> int:
+    """Pack an imagehash.ImageHash (at most 64 bits) into an integer."""
+    return int(str(image_hash), 16)
+
+
+def popcount64(values: np.ndarray) -> np.ndarray:
+    """Number of set bits in each element of a uint64 array."""
+    if hasattr(np, 'bitwise_count'):  # NumPy >= 2.0
+        return np.bitwise_count(values)
+    values = np.ascontiguousarray(values)
+    return _POPCOUNT_8[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def _to_signed64(value: int) -> int:
+    """SQLite INTEGER is signed 64-bit; store unsigned hashes in two's complement."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class HashCache:
+    """On-disk hash cache keyed by absolute path, file size and mtime."""
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < CACHE_SCHEMA_VERSION:
+            # One-time migration: drop the pHash-only table from before multi-hash
+            self.conn.execute("DROP TABLE IF EXISTS hashes")
+            self.conn.execute(f"PRAGMA user_version = {CACHE_SCHEMA_VERSION}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " phash INTEGER NOT NULL,"
+            " dhash INTEGER NOT NULL,"
+            " whash INTEGER NOT NULL,"
+            " colorhash INTEGER NOT NULL,"
+            " width INTEGER NOT NULL,"
+            " height INTEGER NOT NULL)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def _under(root: str) -> Tuple[str, str]:
+        """Key range [low, high) covering every path below root (a primary-key range scan)."""
+        low = os.path.join(os.path.abspath(root), '')
+        return low, low[:-1] + chr(ord(low[-1]) + 1)
+
+    def load(self, root: Optional[str] = None) -> Dict[str, Tuple[int, int, HashRecord]]:
+        """Cached entries (all, or only those below root) as {path: (size, mtime_ns, record)}, in one query."""
+        query = "SELECT path, size, mtime_ns, phash, dhash, whash, colorhash, width, height FROM images"
+        if root:
+            rows = self.conn.execute(query + " WHERE path >= ? AND path < ?", self._under(root))
+        else:
+            rows = self.conn.execute(query)
+        return {
+            row[0]: (row[1], row[2], HashRecord(*(_to_unsigned64(h) for h in row[3:7]), row[7], row[8]))
+            for row in rows
+        }
+
+    def store(self, entries: List[Tuple[str, int, int, HashRecord]]):
+        """Insert or refresh (path, size, mtime_ns, record) entries."""
+        if not entries:
+            return
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO images (path, size, mtime_ns, phash, dhash, whash, colorhash, width, height)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (path, size, mtime_ns, *(_to_signed64(h) for h in record[:4]), record.width, record.height)
+                for path, size, mtime_ns, record in entries
+            ]
+        )
+        self.conn.commit()
+
+    def prune(self, root: str, keep: List[str]) -> int:
+        """Drop entries below root whose files are not in keep (deleted or moved). Returns the count."""
+        keep = {os.path.abspath(path) for path in keep}
+        stale = [(path,) for path, in self.conn.execute(
+            "SELECT path FROM images WHERE path >= ? AND path < ?", self._under(root)
+        ) if path not in keep]
+        self.conn.executemany("DELETE FROM images WHERE path = ?", stale)
+        self.conn.commit()
+        return len(stale)
+
+    def close(self):
+        self.conn.close()
+
+
+def collect_images(roots: List[str], recursive: bool = True) -> List[str]:
+    """Image files under each root (recursively by default), in a stable order, each path once."""
+    seen = set()
+    paths = []
+    for root in roots:
+        if recursive:
+            listing = []
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames.sort()
+                listing.extend(os.path.join(dirpath, filename) for filename in sorted(filenames))
+        else:
+            listing = [os.path.join(root, filename) for filename in sorted(os.listdir(root))]
+        for path in listing:
+            key = os.path.abspath(path)
+            if path.lower().endswith(IMAGE_EXTENSIONS) and key not in seen and os.path.isfile(path):
+                seen.add(key)
+                paths.append(path)
+    return paths
+
+
+def default_workers() -> int:
+    """Number of hashing processes to use when none is specified."""
+    return os.cpu_count() or 1
+
+
+def compute_hashes(path: str, reduce: bool = True) -> HashRecord:
+    """
+    Decode an image once and take all four hashes from it.
+
+    With reduce=True, JPEGs are decoded at 1/2 to 1/8 scale via draft().
+    Hashes can differ from a full decode by a bit or two, well inside any
+    useful similarity threshold.
+    """
+    with Image.open(path) as img:
+        width, height = img.size
+        if reduce:
+            img.draft('RGB', HASH_DECODE_SIZE)
+        work = img.convert('RGB')
+    work.thumbnail(HASH_WORK_SIZE)
+    gray = work.convert('L')
+    return HashRecord(
+        pack_hash(imagehash.phash(gray)),
+        pack_hash(imagehash.dhash(gray)),
+        pack_hash(imagehash.whash(gray, image_scale=64)),
+        pack_hash(imagehash.colorhash(work, binbits=COLORHASH_BINBITS)),
+        width,
+        height,
+    )
+
+
+def _hash_chunk(paths: List[str]) -> List[Tuple[Optional[HashRecord], Optional[str]]]:
+    """Pool task: (record, None) or (None, error) for each path."""
+    results = []
+    for path in paths:
+        try:
+            results.append((compute_hashes(path), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
+def _iter_computed(paths: List[str], workers: int) -> Iterator[Tuple[int, Optional[HashRecord], Optional[str]]]:
+    """Yield (position, record, error) for paths, in completion order."""
+    if workers <= 1 or len(paths) < MIN_POOL_FILES:
+        for position, path in enumerate(paths):
+            record, error = _hash_chunk([path])[0]
+            yield position, record, error
+        return
+
+    chunks = [(start, paths[start:start + HASH_CHUNK]) for start in range(0, len(paths), HASH_CHUNK)]
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = {}
+        pending = iter(chunks)
+        for start, chunk in pending:
+            in_flight[executor.submit(_hash_chunk, chunk)] = start
+            if len(in_flight) >= max_in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start_done = in_flight.pop(future)
+                    for offset, (record, error) in enumerate(future.result()):
+                        yield start_done + offset, record, error
+        for future in list(in_flight):
+            start_done = in_flight.pop(future)
+            for offset, (record, error) in enumerate(future.result()):
+                yield start_done + offset, record, error
+
+
+def iter_hashes(paths: List[str], cache: Optional[HashCache] = None,
+                workers: Optional[int] = None) -> Iterator[Tuple[int, HashRecord]]:
+    """
+    Yield (index into paths, record) as hashes become available: cache
+    hits first, then freshly computed hashes in completion order. Unreadable
+    files are reported and yield nothing. New hashes are written to the cache
+    when the generator finishes.
+    """
+    workers = workers or default_workers()
+    known = {}
+    if cache and paths:
+        try:
+            # Only the part of the shared index that can contain these paths
+            known = cache.load(os.path.dirname(os.path.commonpath([os.path.abspath(p) for p in paths])))
+        except ValueError:  # Different drives
+            known = cache.load()
+    to_hash = []  # (index, cache key, size, mtime_ns)
+    hits = 0
+
+    for index, path in enumerate(paths):
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            print(f"Error loading {os.path.basename(path)}: {e}")
+            continue
+        key = os.path.abspath(path)
+        cached = known.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            hits += 1
+            yield index, cached[2]
+        else:
+            to_hash.append((index, key, stat.st_size, stat.st_mtime_ns))
+
+    new_entries = []
+    try:
+        for position, record, error in _iter_computed([paths[item[0]] for item in to_hash], workers):
+            index, key, size, mtime_ns = to_hash[position]
+            if error:
+                print(f"Error loading {os.path.basename(paths[index])}: {error}")
+                continue
+            new_entries.append((key, size, mtime_ns, record))
+            yield index, record
+    finally:
+        if cache:
+            cache.store(new_entries)
+            print(f"[INFO] Hashed {len(new_entries)} new/modified files, {hits} from cache")
+
+
+def hash_images(paths: List[str], cache: Optional[HashCache] = None,
+                workers: Optional[int] = None) -> List[Tuple[str, HashRecord]]:
+    """
+    Hash every path, reusing cached hashes for files whose size and mtime
+    are unchanged. Unreadable files are reported and left out.
+
+    Returns:
+        [(path, record)] in input order
+    """
+    hashes = dict(iter_hashes(paths, cache, workers))
+    return [(paths[index], hashes[index]) for index in sorted(hashes)]
+
+
+def _partial_digest(path: str, size: int) -> bytes:
+    """Digest of the first and last PARTIAL_HASH_BYTES (the whole file if it is smaller than both)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(PARTIAL_HASH_BYTES))
+        if size > 2 * PARTIAL_HASH_BYTES:
+            f.seek(-PARTIAL_HASH_BYTES, os.SEEK_END)
+        digest.update(f.read(PARTIAL_HASH_BYTES))
+    return digest.digest()
+
+
+def _full_digest(path: str) -> bytes:
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DIGEST_CHUNK), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _group_by(indices: List[int], key) -> List[List[int]]:
+    """Groups of 2+ indices sharing key(index); indices whose key raises OSError are dropped."""
+    groups = defaultdict(list)
+    for index in indices:
+        try:
+            groups[key(index)].append(index)
+        except OSError as e:
+            print(f"[DEBUG] Skipping exact-duplicate check: {e}")
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def find_exact_groups(paths: List[str]) -> List[List[int]]:
+    """
+    Groups of byte-identical files, as sorted lists of indices into paths.
+
+    Stage 1 groups by file size (stat only), stage 2 by a digest of the
+    first and last 64 KB, and stage 3 by a full digest. Each stage only
+    reads the files that are still colliding, so most files are never
+    opened at all.
+    """
+    sizes = {}
+    for index, path in enumerate(paths):
+        try:
+            sizes[index] = os.path.getsize(path)
+        except OSError:
+            continue  # Reported later by the hashing stage
+
+    exact_groups = []
+    for same_size in _group_by(list(sizes), sizes.get):
+        size = sizes[same_size[0]]
+        for same_ends in _group_by(same_size, lambda i: _partial_digest(paths[i], size)):
+            if size <= 2 * PARTIAL_HASH_BYTES:
+                exact_groups.append(same_ends)  # The partial digest already covered every byte
+            else:
+                exact_groups.extend(_group_by(same_ends, lambda i: _full_digest(paths[i])))
+    return sorted(sorted(group) for group in exact_groups)
+
+
+def _linked(a: np.ndarray, b: np.ndarray, threshold: int, color_threshold: int) -> np.ndarray:
+    """Link test for rows of hash arrays a and b (shape (k, 4)): pHash and dHash or wHash close, colours close."""
+    return ((popcount64(a[:, 0] ^ b[:, 0]) <= threshold)
+            & ((popcount64(a[:, 1] ^ b[:, 1]) <= threshold) | (popcount64(a[:, 2] ^ b[:, 2]) <= threshold))
+            & (popcount64(a[:, 3] ^ b[:, 3]) <= color_threshold))
+
+
+class StreamingClusterer:
+    """
+    Links near-duplicate images into clusters while hashes arrive in any
+    order. Each added batch is compared (vectorised) against everything seen
+    so far: pHash within threshold makes a candidate, and the candidate is
+    linked if dHash or wHash is also within threshold and the colour hashes
+    are within color_threshold. Links are merged with union-find.
+    """
+
+    def __init__(self, size: int, threshold: int, color_threshold: int = COLOR_THRESHOLD):
+        self.threshold = threshold
+        self.color_threshold = color_threshold
+        self.parent = list(range(size))  # Union-find over indices 0..size-1
+        self.indices = np.empty(0, dtype=np.int64)
+        self.hashes = np.empty((0, len(HASH_KINDS)), dtype=np.uint64)
+
+    def _find(self, index: int) -> int:
+        parent = self.parent
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]  # Path halving
+            index = parent[index]
+        return index
+
+    def link(self, a: int, b: int):
+        """Put a and b in the same cluster (the lower index becomes the root)."""
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    def add(self, items: List[Tuple[int, HashRecord]]):
+        """Add (index, record) items and link them to their near duplicates."""
+        if not items:
+            return
+        new_indices = np.array([index for index, _ in items], dtype=np.int64)
+        new_hashes = np.array([record[:len(HASH_KINDS)] for _, record in items], dtype=np.uint64)
+        offset = len(self.hashes)
+        all_indices = np.concatenate([self.indices, new_indices])
+        all_hashes = np.concatenate([self.hashes, new_hashes])
+        block = max(1, BLOCK_CELLS // len(all_hashes))
+
+        for start in range(0, len(new_hashes), block):
+            rows = new_hashes[start:start + block]
+            # Candidates: pHash against everything stored before each row (existing + earlier new)
+            distances = popcount64(rows[:, None, 0] ^ all_hashes[None, :offset + start + len(rows), 0])
+            row_idx, col_idx = np.nonzero(distances <= self.threshold)
+            earlier = col_idx < offset + start + row_idx
+            row_idx, col_idx = row_idx[earlier], col_idx[earlier]
+
+            # Confirm with the other hashes, for all candidates at once
+            linked = _linked(rows[row_idx], all_hashes[col_idx], self.threshold, self.color_threshold)
+
+            for x, y in zip(new_indices[start + row_idx[linked]].tolist(), all_indices[col_idx[linked]].tolist()):
+                self.link(x, y)
+
+        self.indices = all_indices
+        self.hashes = all_hashes
+
+    def clusters(self) -> List[List[int]]:
+        """Connected components with 2+ members, each sorted, ordered by first index."""
+        members = defaultdict(list)
+        for index in range(len(self.parent)):
+            members[self._find(index)].append(index)
+        return [group for _, group in sorted(members.items()) if len(group) > 1]
+
+
+class HashIndex:
+    """
+    The shared cache held in memory as one (n, 4) hash array, for fast
+    "which indexed images look like this one?" queries.
+    """
+
+    def __init__(self, paths: List[str], records: List[HashRecord]):
+        self.paths = paths
+        self.hashes = np.array([record[:len(HASH_KINDS)] for record in records], dtype=np.uint64).reshape(-1, len(HASH_KINDS))
+
+    @classmethod
+    def from_cache(cls, cache: HashCache, root: Optional[str] = None) -> 'HashIndex':
+        entries = cache.load(root)
+        return cls(list(entries), [record for _, _, record in entries.values()])
+
+    def __len__(self):
+        return len(self.paths)
+
+    def query(self, record: HashRecord, threshold: int,
+              color_threshold: int = COLOR_THRESHOLD) -> List[Tuple[str, int]]:
+        """Indexed images linked to record, as (path, pHash distance), closest first."""
+        probe = np.array([record[:len(HASH_KINDS)]], dtype=np.uint64)
+        matches = np.nonzero(_linked(probe, self.hashes, threshold, color_threshold))[0]
+        distances = popcount64(probe[0, 0] ^ self.hashes[matches, 0])
+        return sorted(zip((self.paths[i] for i in matches.tolist()), distances.tolist()), key=lambda m: m[1])
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def _pick_representative(cluster: List[int], paths: List[str], records: Dict[int, HashRecord]) -> int:
+    """Highest resolution, then largest file, then first in order."""
+    def quality(index):
+        record = records.get(index)
+        pixels = record.width * record.height if record else 0
+        try:
+            size = os.path.getsize(paths[index])
+        except OSError:
+            size = 0
+        return pixels, size, -index
+    return max(cluster, key=quality)
+
+
+def scan(paths: List[str], threshold: int, cache: Optional[HashCache] = None,
+         workers: Optional[int] = None,
+         progress_callback: Optional[Callable[[int, int], None]] = None,
+         exact_first: bool = True,
+         color_threshold: int = COLOR_THRESHOLD) -> Tuple[Dict[int, HashRecord], List[List[int]], List[List[int]]]:
+    """
+    Find exact duplicates, then hash the remaining paths and cluster near
+    duplicates, linking images as their hashes arrive.
+
+    Args:
+        paths: Image files; cluster indices refer to this list
+        threshold: Maximum Hamming distance (pHash, and dHash or wHash) for a link
+        cache: Optional HashCache for unchanged files
+        workers: Hashing processes (default: CPU count)
+        progress_callback: Called with (hashed, total) after each image
+        exact_first: Group byte-identical files before decoding anything
+        color_threshold: Maximum colour-hash distance for a link
+
+    Returns:
+        ({index: HashRecord} for readable files,
+         [[representative, *other members]] clusters, ordered by first index,
+         [[indices]] byte-identical groups)
+    """
+    exact_groups = find_exact_groups(paths) if exact_first else []
+    # Every member of an identical group is hashed as (and clustered with) its first file
+    duplicate_of = {member: group[0] for group in exact_groups for member in group[1:]}
+    candidates = [index for index in range(len(paths)) if index not in duplicate_of]
+    if exact_groups:
+        print(f"[INFO] {len(duplicate_of)} exact duplicates in {len(exact_groups)} groups; "
+              f"{len(candidates)} files left for perceptual hashing")
+
+    clusterer = StreamingClusterer(len(paths), threshold, color_threshold)
+    records = {}
+    batch = []
+    for position, record in iter_hashes([paths[index] for index in candidates], cache, workers):
+        index = candidates[position]
+        records[index] = record
+        batch.append((index, record))
+        if len(batch) >= MATCH_BATCH:
+            clusterer.add(batch)
+            batch = []
+        if progress_callback:
+            progress_callback(len(records), len(candidates))
+    clusterer.add(batch)
+
+    # Members share their first file's record, in the result and in the shared
+    # index, so a query finds every copy and not only the one that was hashed
+    member_entries = []
+    for member, first in duplicate_of.items():
+        clusterer.link(member, first)
+        if first in records:
+            records[member] = records[first]
+            if cache:
+                try:
+                    stat = os.stat(paths[member])
+                except OSError:
+                    continue
+                member_entries.append((os.path.abspath(paths[member]), stat.st_size,
+                                       stat.st_mtime_ns, records[first]))
+    if member_entries:
+        cache.store(member_entries)
+
+    clusters = []
+    for cluster in clusterer.clusters():
+        representative = _pick_representative(cluster, paths, records)
+        clusters.append([representative] + [index for index in cluster if index != representative])
+    return records, clusters, exact_groups
+
+
+def scan_roots(roots: List[str], threshold: int, cache: Optional[HashCache] = None,
+               recursive: bool = True, workers: Optional[int] = None,
+               progress_callback: Optional[Callable[[int, int], None]] = None,
+               color_threshold: int = COLOR_THRESHOLD):
+    """
+    Scan several folders as one set against the shared index: collect their
+    images, prune index entries for files that are gone, then scan().
+
+    Returns:
+        (paths, records, clusters, exact_groups); indices refer to paths
+    """
+    paths = collect_images(roots, recursive)
+    if cache and recursive:
+        for root in roots:
+            pruned = cache.prune(root, paths)
+            if pruned:
+                print(f"[INFO] Pruned {pruned} missing files under {root} from the index")
+    records, clusters, exact_groups = scan(paths, threshold, cache, workers, progress_callback,
+                                           color_threshold=color_threshold)
+    return paths, records, clusters, exact_groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find duplicate images across folders, backed by a shared hash index")
+    parser.add_argument('roots', nargs='*', help="Folders to scan together")
+    parser.add_argument('-t', '--threshold', type=int, default=10, help="Max Hamming distance (default: 10)")
+    parser.add_argument('--no-recursive', action='store_true', help="Only scan the top level of each folder")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Hashing processes (default: CPU count)")
+    parser.add_argument('--query', action='append', default=[], metavar='IMAGE',
+                        help="Look up an image in the existing index instead of scanning (repeatable)")
+    parser.add_argument('--index', default=DEFAULT_CACHE_PATH, help="Index database path")
+    args = parser.parse_args()
+
+    cache = HashCache(args.index)
+    try:
+        if args.query:
+            start = time.time()
+            index = HashIndex.from_cache(cache)
+            print(f"[INFO] Loaded {len(index)} indexed images in {(time.time() - start) * 1000:.0f} ms")
+            for image in args.query:
+                start = time.time()
+                record = compute_hashes(image)
+                hashed = time.time()
+                matches = index.query(record, args.threshold)
+                print(f"{image}: hashed in {(hashed - start) * 1000:.0f} ms, "
+                      f"{len(matches)} matches in {(time.time() - hashed) * 1000:.1f} ms")
+                for path, distance in matches:
+                    print(f"  {distance:2d}  {path}")
+            return
+
+        if not args.roots:
+            parser.error("give at least one folder to scan, or --query IMAGE")
+        start = time.time()
+        paths, records, clusters, _ = scan_roots(args.roots, args.threshold, cache, not args.no_recursive, args.workers)
+        print(f"[INFO] {len(records)} images, {len(clusters)} duplicate groups in {time.time() - start:.2f}s")
+        for representative, *members in clusters:
+            print(paths[representative])
+            for member in members:
+                print(f"  = {paths[member]}")
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -1,12 +1,14 @@
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
-from PIL import Image
 import os
 import threading
 from pathlib import Path
 import json
 import datetime
+import multiprocessing
+import batch_engine
 #  python image_batch_processor.py
+#  python batch_engine.py --help   (headless CLI, no display needed)
 
 # ============================================
 # COMPRESSION OPTIMIZATION FEATURES:
@@ -15,6 +17,7 @@ import datetime
 # - EXIF stripping: All metadata removed during RGB conversion
 # - LANCZOS resampling: High-fidelity edge preservation
 # - Threading: Robust UI responsiveness during heavy tasks
+# - Process pool: Per-image work spread across all CPU cores (batch_engine.py)
 # - Dynamic watermarking: RGBA transparency integrity maintained
 # ============================================
 class ImageBatchProcessor(ctk.CTk):
@@ -31,15 +34,15 @@ class ImageBatchProcessor(ctk.CTk):
         
         # Initialize variables
         self.source_folder = ""
-        self.details_output_folder = r"C:\Users\Sanzog\Pictures\Screenshots\Details"
-        self.thumbnail_output_folder = r"C:\Users\Sanzog\Pictures\Screenshots\Thumbnail"
+        self.details_output_folder = batch_engine.DEFAULT_DETAILS_FOLDER
+        self.thumbnail_output_folder = batch_engine.DEFAULT_THUMBNAIL_FOLDER
         
         # Selection mode: entire folder or specific files
         self.selection_mode = "folder"
         self.selected_files = []
         
         # Watermark configuration
-        self.watermark_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "watermark_app.png")
+        self.watermark_path = batch_engine.DEFAULT_WATERMARK_PATH
         
         # Setup UI
         self.setup_ui()
@@ -179,7 +182,7 @@ class ImageBatchProcessor(ctk.CTk):
             font=ctk.CTkFont(size=14, weight="bold")
         ).pack(anchor="w", padx=15, pady=(15, 5))
         
-        self.details_resize_mode_var = ctk.StringVar(value="crop")
+        self.details_resize_mode_var = ctk.StringVar(value=batch_engine.DEFAULT_OPTIONS['details_resize_mode'])
         details_mode_frame = ctk.CTkFrame(settings_frame)
         details_mode_frame.pack(fill="x", padx=15, pady=(0, 10))
         
@@ -212,7 +215,7 @@ class ImageBatchProcessor(ctk.CTk):
             placeholder_text="1920",
             width=100
         )
-        self.details_width_entry.insert(0, "1920")
+        self.details_width_entry.insert(0, str(batch_engine.DEFAULT_OPTIONS['details_width']))
         self.details_width_entry.pack(side="left", padx=(0, 5))
         
         ctk.CTkLabel(
@@ -226,7 +229,7 @@ class ImageBatchProcessor(ctk.CTk):
             placeholder_text="1200",
             width=100
         )
-        self.details_height_entry.insert(0, "1200")
+        self.details_height_entry.insert(0, str(batch_engine.DEFAULT_OPTIONS['details_height']))
         self.details_height_entry.pack(side="left", padx=(0, 10))
         
         ctk.CTkLabel(
@@ -243,7 +246,7 @@ class ImageBatchProcessor(ctk.CTk):
             font=ctk.CTkFont(size=14, weight="bold")
         ).pack(anchor="w", padx=15, pady=(10, 5))
         
-        self.thumbnail_resize_mode_var = ctk.StringVar(value="crop")
+        self.thumbnail_resize_mode_var = ctk.StringVar(value=batch_engine.DEFAULT_OPTIONS['thumbnail_resize_mode'])
         thumbnail_mode_frame = ctk.CTkFrame(settings_frame)
         thumbnail_mode_frame.pack(fill="x", padx=15, pady=(0, 10))
         
@@ -276,7 +279,7 @@ class ImageBatchProcessor(ctk.CTk):
             placeholder_text="600",
             width=100
         )
-        self.thumbnail_width_entry.insert(0, "600")
+        self.thumbnail_width_entry.insert(0, str(batch_engine.DEFAULT_OPTIONS['thumbnail_width']))
         self.thumbnail_width_entry.pack(side="left", padx=(0, 5))
         
         ctk.CTkLabel(
@@ -290,7 +293,7 @@ class ImageBatchProcessor(ctk.CTk):
             placeholder_text="400",
             width=100
         )
-        self.thumbnail_height_entry.insert(0, "400")
+        self.thumbnail_height_entry.insert(0, str(batch_engine.DEFAULT_OPTIONS['thumbnail_height']))
         self.thumbnail_height_entry.pack(side="left", padx=(0, 10))
         
         ctk.CTkLabel(
@@ -317,12 +320,12 @@ class ImageBatchProcessor(ctk.CTk):
             number_of_steps=99,
             command=self.update_details_quality_label
         )
-        self.details_quality_slider.set(75)
+        self.details_quality_slider.set(batch_engine.DEFAULT_OPTIONS['details_quality'])
         self.details_quality_slider.pack(side="left", fill="x", expand=True, padx=(0, 10))
         
         self.details_quality_label = ctk.CTkLabel(
             details_quality_frame,
-            text="75",
+            text=str(batch_engine.DEFAULT_OPTIONS['details_quality']),
             width=40
         )
         self.details_quality_label.pack(side="right")
@@ -344,18 +347,18 @@ class ImageBatchProcessor(ctk.CTk):
             number_of_steps=99,
             command=self.update_thumbnail_quality_label
         )
-        self.thumbnail_quality_slider.set(60)
+        self.thumbnail_quality_slider.set(batch_engine.DEFAULT_OPTIONS['thumbnail_quality'])
         self.thumbnail_quality_slider.pack(side="left", fill="x", expand=True, padx=(0, 10))
         
         self.thumbnail_quality_label = ctk.CTkLabel(
             thumbnail_quality_frame,
-            text="60",
+            text=str(batch_engine.DEFAULT_OPTIONS['thumbnail_quality']),
             width=40
         )
         self.thumbnail_quality_label.pack(side="right")
         
         # Keep Original Size Checkbox
-        self.keep_original_size_var = ctk.BooleanVar(value=False)
+        self.keep_original_size_var = ctk.BooleanVar(value=batch_engine.DEFAULT_OPTIONS['keep_original_size'])
         self.keep_original_size_checkbox = ctk.CTkCheckBox(
             settings_frame,
             text="Keep Original Size for Full Image (no crop/resize)",
@@ -364,6 +367,51 @@ class ImageBatchProcessor(ctk.CTk):
         )
         self.keep_original_size_checkbox.pack(anchor="w", padx=15, pady=(5, 10))
         
+        # Reduce-on-load Checkbox
+        self.reduce_on_load_var = ctk.BooleanVar(value=batch_engine.DEFAULT_OPTIONS['reduce_on_load'])
+        self.reduce_on_load_checkbox = ctk.CTkCheckBox(
+            settings_frame,
+            text="Fast JPEG Decode (decode large JPEGs at reduced scale)",
+            variable=self.reduce_on_load_var,
+            font=ctk.CTkFont(size=14)
+        )
+        self.reduce_on_load_checkbox.pack(anchor="w", padx=15, pady=(5, 10))
+        
+        # Incremental Mode Checkbox
+        self.incremental_var = ctk.BooleanVar(value=False)
+        self.incremental_checkbox = ctk.CTkCheckBox(
+            settings_frame,
+            text="Skip Unchanged Images (same file, same settings, outputs present)",
+            variable=self.incremental_var,
+            font=ctk.CTkFont(size=14)
+        )
+        self.incremental_checkbox.pack(anchor="w", padx=15, pady=(5, 10))
+        
+        # Worker Processes (parallel engine)
+        ctk.CTkLabel(
+            settings_frame,
+            text="Worker Processes:",
+            font=ctk.CTkFont(size=14)
+        ).pack(anchor="w", padx=15, pady=(5, 5))
+        
+        workers_frame = ctk.CTkFrame(settings_frame)
+        workers_frame.pack(fill="x", padx=15, pady=(0, 10))
+        
+        self.workers_entry = ctk.CTkEntry(
+            workers_frame,
+            placeholder_text=str(batch_engine.default_workers()),
+            width=100
+        )
+        self.workers_entry.insert(0, str(batch_engine.default_workers()))
+        self.workers_entry.pack(side="left", padx=(0, 10))
+        
+        ctk.CTkLabel(
+            workers_frame,
+            text="(one per CPU core; 1 = single process)",
+            font=ctk.CTkFont(size=11),
+            text_color="gray"
+        ).pack(side="left")
+        
         # Compression Info Label
         ctk.CTkLabel(
             settings_frame,
@@ -389,12 +437,12 @@ class ImageBatchProcessor(ctk.CTk):
             number_of_steps=100,
             command=self.update_watermark_opacity_label
         )
-        self.watermark_opacity_slider.set(80)
+        self.watermark_opacity_slider.set(batch_engine.DEFAULT_OPTIONS['watermark_opacity'])
         self.watermark_opacity_slider.pack(side="left", fill="x", expand=True, padx=(0, 10))
         
         self.watermark_opacity_label = ctk.CTkLabel(
             watermark_opacity_frame,
-            text="80%",
+            text=f"{batch_engine.DEFAULT_OPTIONS['watermark_opacity']}%",
             width=50
         )
         self.watermark_opacity_label.pack(side="right")
@@ -526,6 +574,14 @@ class ImageBatchProcessor(ctk.CTk):
             messagebox.showerror("Error", "Please enter valid thumbnail dimensions")
             return
         
+        try:
+            workers = int(self.workers_entry.get())
+            if workers <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid number of worker processes")
+            return
+        
         # Validate watermark file
         if not os.path.exists(self.watermark_path):
             messagebox.showerror(
@@ -876,17 +932,10 @@ class ImageBatchProcessor(ctk.CTk):
             print(f"[DEBUG] Watermark exists: {os.path.exists(self.watermark_path)}")
             
             # Get all image files from source folder
-            image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.webp'}
-            image_files = []
-            
             if self.selection_mode == "folder":
-                for file in os.listdir(self.source_folder):
-                    if Path(file).suffix.lower() in image_extensions:
-                        image_files.append(os.path.join(self.source_folder, file))
+                image_files = batch_engine.collect_image_files([self.source_folder])
             else:
-                for file in self.selected_files:
-                    if Path(file).suffix.lower() in image_extensions:
-                        image_files.append(file)
+                image_files = batch_engine.collect_image_files(self.selected_files)
             
             print(f"[DEBUG] Found {len(image_files)} image files")
             
@@ -897,30 +946,27 @@ class ImageBatchProcessor(ctk.CTk):
                 return
             
             total_images = len(image_files)
-            details_quality = int(self.details_quality_slider.get())
-            thumbnail_quality = int(self.thumbnail_quality_slider.get())
-            details_width = int(self.details_width_entry.get())
-            details_height = int(self.details_height_entry.get())
-            thumbnail_width = int(self.thumbnail_width_entry.get())
-            thumbnail_height = int(self.thumbnail_height_entry.get())
-            keep_original_size = self.keep_original_size_var.get()
-            details_resize_mode = self.details_resize_mode_var.get()
-            thumbnail_resize_mode = self.thumbnail_resize_mode_var.get()
-            watermark_opacity = int(self.watermark_opacity_slider.get())
+            workers = int(self.workers_entry.get())
+            options = {
+                'details_width': int(self.details_width_entry.get()),
+                'details_height': int(self.details_height_entry.get()),
+                'details_resize_mode': self.details_resize_mode_var.get(),
+                'details_quality': int(self.details_quality_slider.get()),
+                'thumbnail_width': int(self.thumbnail_width_entry.get()),
+                'thumbnail_height': int(self.thumbnail_height_entry.get()),
+                'thumbnail_resize_mode': self.thumbnail_resize_mode_var.get(),
+                'thumbnail_quality': int(self.thumbnail_quality_slider.get()),
+                'watermark_opacity': int(self.watermark_opacity_slider.get()),
+                'keep_original_size': self.keep_original_size_var.get(),
+                'reduce_on_load': self.reduce_on_load_var.get()
+            }
             
             print(f"[DEBUG] Details output: {self.details_output_folder}")
             print(f"[DEBUG] Thumbnail output: {self.thumbnail_output_folder}")
             
-            # Create output folders if they don't exist
-            os.makedirs(self.details_output_folder, exist_ok=True)
-            os.makedirs(self.thumbnail_output_folder, exist_ok=True)
-            
-            print(f"[DEBUG] Output folders created/verified")
-            print(f"[DEBUG] Starting to load watermark...")
-            
             # Load watermark image once (RGBA for alpha support)
             try:
-                watermark_image = Image.open(self.watermark_path).convert("RGBA")
+                watermark_image = batch_engine.load_watermark(self.watermark_path)
                 print(f"[DEBUG] Watermark loaded successfully: {watermark_image.size}")
             except Exception as wm_error:
                 print(f"[ERROR] Failed to load watermark: {wm_error}")
@@ -931,179 +977,37 @@ class ImageBatchProcessor(ctk.CTk):
                 self.after(0, lambda: self.start_button.configure(state="normal"))
                 return
             
-            print(f"[DEBUG] Starting image processing loop with {total_images} images")
+            print(f"[DEBUG] Starting image processing with {total_images} images on {workers} worker(s)")
             
-            # Process each image
-            for index, source_path in enumerate(image_files):
-                try:
-                    print(f"[DEBUG] Processing image {index + 1}/{total_images}: {os.path.basename(source_path)}")
-                    # Open image and convert to RGB with metadata stripping
-                    with Image.open(source_path) as img:
-                        # Strip all EXIF and metadata, convert to RGB
-                        # Create new image without metadata for minimum file size
-                        img_data = img.convert('RGB')
-                        img = img_data
-                        
-                        base_name = Path(source_path).stem
-                        
-                        # Auto-detect if image is smaller than target dimensions
-                        # If image is smaller than 1920x1200, automatically keep original size to prevent stretching
-                        auto_keep_original = (img.width < details_width or img.height < details_height)
-                        if auto_keep_original:
-                            print(f"[DEBUG] Auto-keeping original size: {img.width}x{img.height} (smaller than {details_width}x{details_height})")
-                        
-                        # Prepare save options for details image
-                        # Advanced WebP encoding: method=6 (exhaustive search) + subsampling=0 (preserve color)
-                        details_save_options = {
-                            'format': 'WEBP',
-                            'quality': details_quality,
-                            'optimize': True,
-                            'method': 6,
-                            'subsampling': 0  # Maintain color sharpness on edges and watermarks
-                        }
-                        
-                        # Create full image
-                        if keep_original_size or auto_keep_original:
-                            # Keep original size without cropping or resizing
-                            details_img = img.copy()
-                        elif details_resize_mode == "scale":
-                            # Scale to fit - resize to fit within dimensions without cropping
-                            # This preserves all content like Photoshop's Image Size
-                            img.thumbnail((details_width, details_height), Image.LANCZOS)
-                            details_img = img.copy()
-                        else:
-                            # Crop to fit - crop to exact aspect ratio then resize
-                            target_ratio = details_width / details_height
-                            current_ratio = img.width / img.height
-                            
-                            if current_ratio > target_ratio:
-                                # Image is wider - crop width
-                                new_width = int(img.height * target_ratio)
-                                left = (img.width - new_width) // 2
-                                img_cropped = img.crop((left, 0, left + new_width, img.height))
-                            else:
-                                # Image is taller - crop height
-                                new_height = int(img.width / target_ratio)
-                                top = (img.height - new_height) // 2
-                                img_cropped = img.crop((0, top, img.width, top + new_height))
-                            
-                            # Resize to exact dimensions using LANCZOS resampling
-                            details_img = img_cropped.resize((details_width, details_height), Image.LANCZOS)
-                        
-                        # Apply watermark with transparency integrity on temporary RGBA layer
-                        details_rgba = details_img.convert("RGBA")
-                        wm = watermark_image.copy()
-                        
-                        # PROPORTIONAL WATERMARK SCALING: Scale watermark based on image size
-                        # Reference dimensions: 1920x1200 with original watermark size (400x200)
-                        # Logic: Scale down for images smaller than reference, never upscale
-                        reference_width = 1920
-                        reference_height = 1200
-                        
-                        # Calculate scale factor based on both dimensions (use minimum to maintain aspect ratio)
-                        scale_factor_width = details_img.width / reference_width
-                        scale_factor_height = details_img.height / reference_height
-                        scale_factor = min(scale_factor_width, scale_factor_height)
-                        
-                        # Never upscale the watermark beyond its original size
-                        scale_factor = min(scale_factor, 1.0)
-                        
-                        # Calculate new watermark dimensions
-                        new_wm_width = int(watermark_image.width * scale_factor)
-                        new_wm_height = int(watermark_image.height * scale_factor)
-                        
-                        # Resize watermark with LANCZOS resampling for quality
-                        if scale_factor < 1.0:
-                            wm = watermark_image.resize((new_wm_width, new_wm_height), Image.LANCZOS)
-                            print(f"[DEBUG] Watermark scaled: {watermark_image.width}x{watermark_image.height} → {new_wm_width}x{new_wm_height} (factor: {scale_factor:.2f}) for image {details_img.width}x{details_img.height}")
-                        else:
-                            wm = watermark_image.copy()
-                            print(f"[DEBUG] Watermark kept at original size: {wm.width}x{wm.height} for image {details_img.width}x{details_img.height}")
-                        
-                        # Apply opacity to watermark while preserving alpha channel integrity
-                        if watermark_opacity < 100:
-                            alpha = wm.split()[3]  # Get alpha channel
-                            # Scale alpha based on opacity percentage
-                            alpha = alpha.point(lambda p: int(p * watermark_opacity / 100))
-                            wm.putalpha(alpha)
-                        
-                        # Calculate watermark position dynamically for consistent placement
-                        # Horizontal: center of image | Vertical: 3/4 down from top
-                        wm_x = max(0, (details_img.width - wm.width) // 2)
-                        wm_y = max(0, int(details_img.height * 0.75) - wm.height // 2)
-                        
-                        # Paste watermark on RGBA layer using alpha mask for fidelity
-                        details_rgba.paste(wm, (wm_x, wm_y), wm)
-                        
-                        # Convert back to RGB for WebP encoding (maintains watermark quality)
-                        details_img = details_rgba.convert("RGB")
-                        
-                        details_filename = f"{base_name}.webp"
-                        details_path = os.path.join(self.details_output_folder, details_filename)
-                        details_img.save(details_path, **details_save_options)
-                        print(f"[DEBUG] Saved details: {details_path} ({os.path.getsize(details_path) / 1024:.1f} KB)")
-                        
-                        # Prepare save options for thumbnail image
-                        # Advanced WebP encoding: method=6 (exhaustive search) + subsampling=0 (preserve color)
-                        thumbnail_save_options = {
-                            'format': 'WEBP',
-                            'quality': thumbnail_quality,
-                            'optimize': True,
-                            'method': 6,
-                            'subsampling': 0  # Maintain color sharpness on edges and watermarks
-                        }
-                        
-                        # Create thumbnail with metadata stripped
-                        # Re-open the original image for thumbnail processing
-                        with Image.open(source_path) as img_thumb:
-                            # Strip metadata during RGB conversion
-                            img_thumb = img_thumb.convert('RGB')
-                            
-                            if thumbnail_resize_mode == "scale":
-                                # Scale to fit - resize to fit within dimensions without cropping
-                                img_thumb.thumbnail((thumbnail_width, thumbnail_height), Image.LANCZOS)
-                                thumbnail = img_thumb.copy()
-                            else:
-                                # Crop to fit - crop to exact aspect ratio then resize
-                                thumb_target_ratio = thumbnail_width / thumbnail_height
-                                thumb_current_ratio = img_thumb.width / img_thumb.height
-                                
-                                if thumb_current_ratio > thumb_target_ratio:
-                                    # Image is wider - crop width
-                                    thumb_new_width = int(img_thumb.height * thumb_target_ratio)
-                                    thumb_left = (img_thumb.width - thumb_new_width) // 2
-                                    thumb_cropped = img_thumb.crop((thumb_left, 0, thumb_left + thumb_new_width, img_thumb.height))
-                                else:
-                                    # Image is taller - crop height
-                                    thumb_new_height = int(img_thumb.width / thumb_target_ratio)
-                                    thumb_top = (img_thumb.height - thumb_new_height) // 2
-                                    thumb_cropped = img_thumb.crop((0, thumb_top, img_thumb.width, thumb_top + thumb_new_height))
-                                
-                                # Resize to exact dimensions using LANCZOS resampling
-                                thumbnail = thumb_cropped.resize((thumbnail_width, thumbnail_height), Image.LANCZOS)
-                        
-                        thumbnail_filename = f"{base_name}_thumb.webp"
-                        thumbnail_path = os.path.join(self.thumbnail_output_folder, thumbnail_filename)
-                        thumbnail.save(thumbnail_path, **thumbnail_save_options)
-                        print(f"[DEBUG] Saved thumbnail: {thumbnail_path} ({os.path.getsize(thumbnail_path) / 1024:.1f} KB)")
-                        
-                except Exception as e:
-                    import traceback
-                    print(f"[ERROR] Error processing {source_path}: {str(e)}")
-                    traceback.print_exc()
-                    continue
-                
-                # Update progress
-                progress = (index + 1) / total_images
+            def on_progress(done, total, result):
+                # Called from this background thread; hand UI updates to the Tk loop
+                progress = done / total
                 self.after(0, lambda p=progress: self.progress_bar.set(p))
-                self.after(0, lambda idx=index+1, total=total_images: 
-                          self.progress_label.configure(text=f"Processing: {idx}/{total} images"))
+                self.after(0, lambda idx=done, t=total: 
+                          self.progress_label.configure(text=f"Processing: {idx}/{t} images"))
+            
+            # The pipeline itself lives in batch_engine (also usable headless)
+            results = batch_engine.run_batch(
+                image_files,
+                self.details_output_folder,
+                self.thumbnail_output_folder,
+                watermark_path=self.watermark_path,
+                workers=workers,
+                progress_callback=on_progress,
+                incremental=self.incremental_var.get(),
+                **options
+            )
+            skipped = sum(1 for r in results if r.get('skipped'))
+            succeeded = sum(1 for r in results if r['ok']) - skipped
+            failed = total_images - succeeded - skipped
             
             # Show completion message
-            self.after(0, lambda: messagebox.showinfo(
-                "Success", 
-                f"Batch processing complete!\n\n{total_images} images processed successfully."
-            ))
+            summary = f"Batch processing complete!\n\n{succeeded} images processed successfully."
+            if failed:
+                summary += f"\n{failed} images failed (see console for details)."
+            if skipped:
+                summary += f"\n{skipped} unchanged images skipped."
+            self.after(0, lambda: messagebox.showinfo("Success", summary))
             
             # Save the highest number that was actually generated for next session
             highest_generated = self.auto_detect_highest_number()
@@ -1124,5 +1028,6 @@ class ImageBatchProcessor(ctk.CTk):
             self.after(0, lambda: self.progress_label.configure(text="Process complete"))
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = ImageBatchProcessor()
     app.mainloop()
@@ -0,0 +1,39 @@
+"""
+Reduce-on-load decoding shared by the batch tools
+=================================================
+When an image is only going to be downscaled, the decoder can be told the
+target size up front. For JPEG, Pillow's draft() turns on libjpeg DCT scaling
+(1/2, 1/4 or 1/8), so a 6000 px photo headed for 1920 px is decoded at
+3000 px and the full-resolution bitmap is never built. Other formats ignore
+the hint and decode normally.
+
+draft() only picks scales that keep both dimensions at or above the
+requested size, so callers still finish with their usual LANCZOS resize.
+The result is not bit-identical to a full decode followed by the same
+resize. The difference is below visible level at the sizes these tools
+produce.
+"""
+
+import math
+
+from PIL import Image
+
+
+def reduce_on_load(img: Image.Image, target_size) -> Image.Image:
+    """
+    Ask the decoder of a freshly opened (not yet loaded) image to decode at
+    no less than target_size (width, height). No-op if the image is already
+    small enough or the format has no reduced decode.
+    """
+    if not target_size:
+        return img
+    target_width, target_height = target_size
+    if img.width >= target_width * 2 and img.height >= target_height * 2:
+        img.draft(None, (target_width, target_height))
+    return img
+
+
+def fit_width_size(size, max_width):
+    """Target size for scaling (width, height) down to max_width, keeping the aspect ratio."""
+    width, height = size
+    return max_width, max(1, math.ceil(max_width * height / width))
@@ -0,0 +1,174 @@
+"""
+Local ONNX inpainting backend
+=============================
+Runs a LaMa-class inpainting model exported to ONNX on the CPU. It is the
+backend of the 'ai' algorithm in watermark_remover.py. The model is read
+from a local file; nothing is downloaded.
+
+The usual LaMa exports take two float32 inputs: image (1, 3, H, W), RGB in
+0..1, and mask (1, 1, H, W), 1 = fill. They return the filled RGB image,
+in 0..255 for most exports and in 0..1 for some; the range is detected on
+the first tile. Fixed-size exports set the tile size. Dynamic ones use
+DEFAULT_TILE and are padded to a multiple of 8.
+
+Only the mask is run through the model. The region is covered with
+overlapping tiles, tiles without mask pixels are skipped, and overlaps are
+feathered together. Sessions are cached per (model, threads), so a batch
+worker, or a GUI that creates a remover per image, loads the model once.
+
+Requirements:
+    pip install onnxruntime
+"""
+
+import os
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:  # Only needed when a model file is used
+    ort = None
+
+
+# Tile size for models with dynamic input shapes
+DEFAULT_TILE = 512
+
+# Pixels shared by neighbouring tiles; their outputs are cross-faded over this distance
+TILE_OVERLAP = 64
+
+_sessions: Dict[Tuple[str, int], "ort.InferenceSession"] = {}
+
+
+def load_session(model_path: str, threads: int = 0):
+    """
+    InferenceSession for model_path on the CPU, cached per (model, threads).
+
+    Args:
+        model_path: Path to the .onnx file
+        threads: Intra-op threads (0 = onnxruntime default, all cores)
+    """
+    if ort is None:
+        raise RuntimeError("The ONNX backend needs onnxruntime: pip install onnxruntime")
+    key = (os.path.abspath(model_path), threads)
+    session = _sessions.get(key)
+    if session is None:
+        if not os.path.isfile(model_path):
+            raise ValueError(f"Model not found: {model_path}")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        _sessions[key] = session
+    return session
+
+
+class OnnxInpainter:
+    """Inpaints BGR images with a local ONNX model, tile by tile over the mask."""
+
+    def __init__(self, model_path: str, threads: int = 0):
+        """
+        Args:
+            model_path: Path to the .onnx model (image + mask in, image out)
+            threads: Intra-op threads for onnxruntime (0 = all cores)
+        """
+        self.session = load_session(model_path, threads)
+
+        inputs = self.session.get_inputs()
+        if len(inputs) != 2:
+            raise ValueError(f"Expected an image and a mask input, {os.path.basename(model_path)} "
+                             f"has {len(inputs)}")
+        mask_input = next((i for i in inputs if 'mask' in i.name.lower()),
+                          next((i for i in inputs if i.shape[1] == 1), inputs[1]))
+        image_input = inputs[1] if mask_input is inputs[0] else inputs[0]
+        self.image_name = image_input.name
+        self.mask_name = mask_input.name
+        self.output_name = self.session.get_outputs()[0].name
+
+        height, width = image_input.shape[2:4]
+        self.fixed_size = isinstance(height, int) and isinstance(width, int)
+        self.tile_size = (height, width) if self.fixed_size else (DEFAULT_TILE, DEFAULT_TILE)
+
+        # Context around the mask the caller should include in the crops it passes in
+        self.context = min(self.tile_size) // 4
+        self.output_scale = None  # 255 for 0..1 outputs, found on the first tile
+
+        overlap = min(TILE_OVERLAP, min(self.tile_size) // 4)
+        self.stride = (self.tile_size[0] - overlap, self.tile_size[1] - overlap)
+        self.feather = self._make_feather(self.tile_size, overlap)
+
+    def inpaint(self, img: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        Fill the mask (255 = fill) of a BGR image. Pixels outside the mask
+        are returned unchanged.
+        """
+        result = img.copy()
+        filled = mask > 0
+        if not filled.any():
+            return result
+
+        h, w = mask.shape[:2]
+        acc = np.zeros((h, w, 3), np.float32)
+        weight = np.zeros((h, w), np.float32)
+        tile_h, tile_w = self.tile_size
+        for y0, x0 in self._tiles(mask):
+            y1, x1 = min(h, y0 + tile_h), min(w, x0 + tile_w)
+            out = self._run(img[y0:y1, x0:x1], mask[y0:y1, x0:x1])
+            feather = self.feather[:y1 - y0, :x1 - x0]
+            acc[y0:y1, x0:x1] += out * feather[:, :, None]
+            weight[y0:y1, x0:x1] += feather
+
+        values = acc[filled] / weight[filled][:, None]
+        result[filled] = np.clip(values + 0.5, 0, 255).astype(np.uint8)
+        return result
+
+    def _tiles(self, mask: np.ndarray) -> List[Tuple[int, int]]:
+        """Top-left corners of the overlapping tiles that contain mask pixels."""
+        h, w = mask.shape[:2]
+        tile_h, tile_w = self.tile_size
+        rows = self._starts(h, tile_h, self.stride[0])
+        cols = self._starts(w, tile_w, self.stride[1])
+        return [(y, x) for y in rows for x in cols if mask[y:y + tile_h, x:x + tile_w].any()]
+
+    @staticmethod
+    def _starts(length: int, tile: int, stride: int) -> List[int]:
+        if length <= tile:
+            return [0]
+        starts = list(range(0, length - tile, stride))
+        starts.append(length - tile)
+        return starts
+
+    @staticmethod
+    def _make_feather(size: Tuple[int, int], overlap: int) -> np.ndarray:
+        """Tile weights ramping up over the overlap from each edge; never zero."""
+        def ramp(n):
+            edge = np.minimum(np.arange(1, n + 1), np.arange(n, 0, -1))
+            return np.minimum(edge / max(1, overlap), 1.0).astype(np.float32)
+        return np.outer(ramp(size[0]), ramp(size[1]))
+
+    def _run(self, tile: np.ndarray, tile_mask: np.ndarray) -> np.ndarray:
+        """Model output (BGR float32, 0..255) for one tile, padded to the model size as needed."""
+        h, w = tile.shape[:2]
+        if self.fixed_size:
+            target_h, target_w = self.tile_size
+        else:
+            target_h, target_w = -(-h // 8) * 8, -(-w // 8) * 8
+        if (h, w) != (target_h, target_w):
+            tile = cv2.copyMakeBorder(tile, 0, target_h - h, 0, target_w - w, cv2.BORDER_REFLECT_101)
+            tile_mask = cv2.copyMakeBorder(tile_mask, 0, target_h - h, 0, target_w - w,
+                                           cv2.BORDER_CONSTANT, value=0)
+
+        image = cv2.cvtColor(tile, cv2.COLOR_BGR2RGB).astype(np.float32) / 255.0
+        image = image.transpose(2, 0, 1)[None]
+        mask = (tile_mask > 0).astype(np.float32)[None, None]
+        out = self.session.run([self.output_name], {self.image_name: image, self.mask_name: mask})[0][0]
+
+        if self.output_scale is None:
+            self.output_scale = 255.0 if float(out.max()) <= 1.0 + 1e-3 else 1.0
+        out = np.ascontiguousarray(out.transpose(1, 2, 0)[:h, :w], dtype=np.float32)
+        if self.output_scale != 1.0:
+            out *= self.output_scale
+        return cv2.cvtColor(out, cv2.COLOR_RGB2BGR)
@@ -2,8 +2,181 @@ import customtkinter as ctk
 from tkinter import filedialog, messagebox
 from PIL import Image
 import os
+import io
+import math
+import statistics
 import threading
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from pathlib import Path
+from image_decode import reduce_on_load, fit_width_size
+
+MAX_QUALITY = 85  # Anything above 85 is usually overkill for web
+MAX_PROBES = 6    # Same worst case as the old 6-step binary search (minus the final re-encode)
+TARGET_TOLERANCE = 0.05  # Stop once a fitting encode is within 5% under the target
+
+
+class SizeModel:
+    """
+    Predicts WebP size from quality, fitted on earlier images in the batch.
+
+    WebP size grows roughly exponentially with quality, so per image
+    ln(bytes / pixel) ~= intercept + slope * quality. The slope is fairly
+    stable across a batch; the intercept depends on image content.
+    """
+    DEFAULT_SLOPE = 0.025
+
+    def __init__(self, history=50):
+        self.slopes = deque(maxlen=history)
+        self.intercepts = deque(maxlen=history)
+
+    def slope(self):
+        return statistics.median(self.slopes) if self.slopes else self.DEFAULT_SLOPE
+
+    def record(self, probes, pixels):
+        """Learn from one image's probes ({quality: size_bytes})."""
+        qualities = sorted(probes)
+        if len(qualities) >= 2:
+            q_lo, q_hi = qualities[0], qualities[-1]
+            slope = math.log(probes[q_hi] / probes[q_lo]) / (q_hi - q_lo)
+            if slope > 0:
+                self.slopes.append(slope)
+        slope = self.slope()
+        self.intercepts.append(statistics.mean(
+            math.log(probes[q] / pixels) - slope * q for q in qualities
+        ))
+
+    def predict(self, target_bytes, pixels):
+        """Quality expected to hit target_bytes, or None before the first image."""
+        if not self.intercepts:
+            return None
+        return (math.log(target_bytes / pixels) - statistics.median(self.intercepts)) / self.slope()
+
+
+def encode_webp(img, quality):
+    """Encode to WebP in memory ('method 6' is the best compression WebP offers)."""
+    buffer = io.BytesIO()
+    img.save(buffer, "WEBP", quality=quality, method=6, optimize=True)
+    return buffer.getvalue()
+
+
+def compress_to_target(img, path, target_kb, min_q, model=None):
+    """
+    Write the highest quality WebP in [min_q, MAX_QUALITY] that fits target_kb.
+
+    Starts from the model's predicted quality and takes secant steps along
+    the fitted size curve, keeping every probe in memory so the winner is
+    written as-is (no final re-encode). Usually 2-3 encodes instead of 7.
+    If nothing fits, or the target is not positive, min_q is used, as before.
+
+    Returns:
+        (quality, size_bytes) of the written file
+    """
+    if model is None:
+        model = SizeModel()
+    target_bytes = target_kb * 1024
+    pixels = img.width * img.height
+    low, high = int(min_q), MAX_QUALITY
+
+    if target_bytes <= 0:
+        # Nothing can fit; skip the search (and the log of a non-positive size)
+        data = encode_webp(img, low)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return low, len(data)
+
+    probes = {}          # quality -> encoded bytes
+    best_q = None        # highest quality known to fit
+    too_big_q = high + 1  # lowest quality known not to fit
+    prev = None          # (quality, size) of the previous probe
+
+    predicted = model.predict(target_bytes, pixels)
+    q = round(predicted) if predicted is not None else (low + high) // 2
+
+    for _ in range(MAX_PROBES):
+        lo = best_q if best_q is not None else low - 1
+        if lo + 1 > too_big_q - 1:
+            break  # Search interval exhausted
+        q = min(max(q, lo + 1), too_big_q - 1)
+
+        data = probes.get(q) or encode_webp(img, q)
+        probes[q] = data
+        size = len(data)
+
+        if size <= target_bytes:
+            best_q = q
+            if size >= target_bytes * (1 - TARGET_TOLERANCE):
+                break  # Close enough to the target
+        else:
+            too_big_q = q
+
+        # Secant step through the last two probes (the fitted slope for the
+        # first one), clamped to the open bracket (lo, too_big_q) at the top
+        # of the loop, so an overshoot past MAX_QUALITY probes the max next
+        slope = model.slope()
+        if prev is not None and prev[0] != q and prev[1] != size:
+            measured = math.log(size / prev[1]) / (q - prev[0])
+            if measured > 0:
+                slope = measured
+        prev = (q, size)
+        step = (math.log(target_bytes) - math.log(size)) / slope
+        delta = int(round(step))
+        if delta == 0:
+            delta = 1 if size <= target_bytes else -1
+        q += delta
+
+    model.record({q: len(data) for q, data in probes.items()}, pixels)
+
+    if best_q is None:
+        best_q = low
+        if best_q not in probes:
+            probes[best_q] = encode_webp(img, best_q)
+
+    data = probes[best_q]
+    with open(path, 'wb') as f:
+        f.write(data)
+    return best_q, len(data)
+
+
+def compress_file(input_path, output_path, target_kb, min_q, model=None, max_width=0):
+    """
+    Compress one file to the target size; errors are returned, not raised.
+    With max_width, wider images are downscaled first (JPEGs decode at reduced scale).
+    """
+    result = {'name': os.path.basename(input_path), 'ok': False,
+              'input_bytes': 0, 'quality': None, 'size': 0}
+    try:
+        result['input_bytes'] = os.path.getsize(input_path)
+        with Image.open(input_path) as img:
+            final_size = None
+            if max_width and img.width > max_width:
+                final_size = fit_width_size(img.size, max_width)
+                reduce_on_load(img, final_size)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            if final_size:
+                img = img.resize(final_size, Image.LANCZOS)
+            result['quality'], result['size'] = compress_to_target(img, output_path, target_kb, min_q, model)
+        result['ok'] = True
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+# Each pool worker fits its own size model over the images it handles
+_worker_model = None
+
+
+def _init_worker():
+    global _worker_model
+    _worker_model = SizeModel()
+
+
+def _compress_in_worker(input_path, output_path, target_kb, min_q, max_width):
+    return compress_file(input_path, output_path, target_kb, min_q, _worker_model, max_width)
+
 
 class UltraCompressor(ctk.CTk):
     def __init__(self):
@@ -14,6 +187,9 @@ class UltraCompressor(ctk.CTk):
         
         self.source_folder = ""
         self.output_folder = ""
+        self.size_model = SizeModel()
+        self.workers = os.cpu_count() or 1
+        self.max_width = 0
         
         self.setup_ui()
 
@@ -46,6 +222,18 @@ class UltraCompressor(ctk.CTk):
         self.quality_floor.set(20)
         self.quality_floor.pack()
 
+        # Optional downscale before compressing (big photos rarely need full resolution)
+        ctk.CTkLabel(self, text="Max Width (px, 0 = keep original):").pack(pady=(10, 5))
+        self.max_width_entry = ctk.CTkEntry(self, placeholder_text="0")
+        self.max_width_entry.insert(0, "0")
+        self.max_width_entry.pack()
+
+        # Parallel workers (1 = compress one image at a time)
+        ctk.CTkLabel(self, text="Worker Processes:").pack(pady=(10, 5))
+        self.workers_entry = ctk.CTkEntry(self, placeholder_text=str(os.cpu_count() or 1))
+        self.workers_entry.insert(0, str(os.cpu_count() or 1))
+        self.workers_entry.pack()
+
         # Start Button
         self.start_btn = ctk.CTkButton(self, text="Start Ultra Compression", fg_color="green", height=40, command=self.start_process)
         self.start_btn.pack(pady=30)
@@ -54,6 +242,9 @@ class UltraCompressor(ctk.CTk):
         self.progress.pack(fill="x", padx=20)
         self.progress.set(0)
 
+        self.lbl_status = ctk.CTkLabel(self, text="Ready", text_color="gray")
+        self.lbl_status.pack(pady=10)
+
     def select_source(self):
         self.source_folder = filedialog.askdirectory()
         self.lbl_source.configure(text=self.source_folder)
@@ -62,54 +253,108 @@ class UltraCompressor(ctk.CTk):
         self.output_folder = filedialog.askdirectory()
         self.lbl_output.configure(text=self.output_folder)
 
-    def smart_compress(self, img, path, target_kb, min_q):
-        """Binary search to find lowest quality that hits target KB."""
-        low = int(min_q)
-        high = 85 # Anything above 85 is usually overkill for web
-        best_q = low
-        
-        # 'method 6' is the best compression algorithm available in WebP
-        # 'optimize' ensures the encoder performs extra passes for size
-        for _ in range(6): 
-            mid = (low + high) // 2
-            img.save(path, "WEBP", quality=mid, method=6, optimize=True)
-            size = os.path.getsize(path) / 1024
-            
-            if size <= target_kb:
-                best_q = mid
-                low = mid + 1
-            else:
-                high = mid - 1
-        
-        # Final save with best found quality
-        img.save(path, "WEBP", quality=best_q, method=6, optimize=True)
+    def iter_results(self, jobs, target_kb, min_q, workers, max_width=0):
+        """Yield one result per job, in completion order, keeping at most 2 jobs per worker in flight."""
+        if workers <= 1:
+            for input_path, output_path in jobs:
+                yield compress_file(input_path, output_path, target_kb, min_q, self.size_model, max_width)
+            return
+
+        jobs = iter(jobs)
+        max_in_flight = workers * 2  # Bounded queue: decoded images never pile up
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            in_flight = {}  # future -> input path
+            for input_path, output_path in jobs:
+                try:
+                    future = executor.submit(_compress_in_worker, input_path, output_path, target_kb, min_q, max_width)
+                except Exception as e:
+                    # The pool broke earlier; report the remaining files instead of aborting
+                    yield self._failed_result(input_path, e)
+                    continue
+                in_flight[future] = input_path
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield self._future_result(future, in_flight.pop(future))
+            for future in as_completed(list(in_flight)):
+                yield self._future_result(future, in_flight.pop(future))
+
+    @staticmethod
+    def _future_result(future, input_path):
+        """The worker's result, or a failed result for input_path if the worker itself failed."""
+        try:
+            return future.result()
+        except Exception as e:
+            # Worker crashed (e.g. a decoder segfault) or the pool broke
+            return UltraCompressor._failed_result(input_path, e)
+
+    @staticmethod
+    def _failed_result(input_path, error):
+        return {'name': os.path.basename(input_path), 'ok': False,
+                'input_bytes': 0, 'quality': None, 'size': 0, 'error': str(error)}
 
     def process_images(self):
-        files = [f for f in os.listdir(self.source_folder) if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp'))]
-        target_kb = int(self.target_kb_entry.get())
-        min_q = self.quality_floor.get()
-        
-        for i, filename in enumerate(files):
-            input_path = os.path.join(self.source_folder, filename)
-            output_path = os.path.join(self.output_folder, f"{Path(filename).stem}.webp")
-            
-            with Image.open(input_path) as img:
-                if img.mode != "RGB":
-                    img = img.convert("RGB")
-                self.smart_compress(img, output_path, target_kb, min_q)
-            
-            self.progress.set((i + 1) / len(files))
-        
-        messagebox.showinfo("Done", "All images compressed to the lowest possible size!")
-        self.start_btn.configure(state="normal")
+        try:
+            files = [f for f in os.listdir(self.source_folder) if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp'))]
+            target_kb = int(self.target_kb_entry.get())
+            if target_kb <= 0:
+                raise ValueError("Target file size must be a positive number of KB")
+            min_q = self.quality_floor.get()
+            workers = max(1, min(self.workers, len(files)))
+            self.size_model = SizeModel()  # Fit afresh for each batch
+
+            jobs = [
+                (os.path.join(self.source_folder, filename),
+                 os.path.join(self.output_folder, f"{Path(filename).stem}.webp"))
+                for filename in files
+            ]
+
+            start = time.perf_counter()
+            done = failed = input_bytes = 0
+            for result in self.iter_results(jobs, target_kb, min_q, workers, self.max_width):
+                done += 1
+                input_bytes += result['input_bytes']
+                if result['ok']:
+                    print(f"[OK] {result['name']}: quality {result['quality']}, {result['size'] / 1024:.1f} KB")
+                else:
+                    failed += 1
+                    print(f"[FAILED] {result['name']}: {result['error']}")
+                self.after(0, lambda p=done / len(files): self.progress.set(p))
+                self.after(0, lambda d=done: self.lbl_status.configure(text=f"Compressed {d}/{len(files)}"))
+
+            elapsed = max(time.perf_counter() - start, 1e-6)
+            summary = (f"{done - failed}/{len(files)} images in {elapsed:.1f}s "
+                       f"({done / elapsed:.1f} images/s, {input_bytes / 1024 / 1024 / elapsed:.1f} MB/s)")
+            print(f"[DONE] {summary}")
+            self.after(0, lambda: self.lbl_status.configure(text=summary))
+            self.after(0, lambda: messagebox.showinfo("Done", f"All images compressed to the lowest possible size!\n\n{summary}"))
+        except Exception as e:
+            self.after(0, lambda e=e: messagebox.showerror("Error", str(e)))
+        finally:
+            self.after(0, lambda: self.start_btn.configure(state="normal"))
 
     def start_process(self):
         if not self.source_folder or not self.output_folder:
             messagebox.showerror("Error", "Select folders first!")
             return
+        try:
+            self.max_width = int(self.max_width_entry.get() or 0)
+            if self.max_width < 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Enter a valid max width (0 = keep original)!")
+            return
+        try:
+            self.workers = int(self.workers_entry.get())
+            if self.workers <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Enter a valid number of worker processes!")
+            return
         self.start_btn.configure(state="disabled")
         threading.Thread(target=self.process_images, daemon=True).start()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = UltraCompressor()
     app.mainloop()
\ No newline at end of file
@@ -3,7 +3,76 @@ from tkinter import filedialog, messagebox
 from PIL import Image
 import os
 import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from pathlib import Path
+from image_decode import reduce_on_load, fit_width_size
+
+# Minimum seconds between progress updates sent to the Tk event loop (max 10/s)
+PROGRESS_INTERVAL = 0.1
+
+
+def build_save_options(format_name, options):
+    """Pillow save() keyword arguments for the chosen output format."""
+    if format_name == "JPEG":
+        return {'quality': options['quality'], 'optimize': options['optimize'], 'progressive': True}
+    elif format_name == "PNG":
+        return {'optimize': options['optimize'], 'compress_level': options['png_compress']}
+    elif format_name == "WEBP":
+        return {'quality': options['quality'], 'method': options['webp_method'], 'lossless': False}
+    elif format_name == "TIFF":
+        return {'quality': options['quality'], 'compression': 'jpeg'}
+    elif format_name == "GIF":
+        return {'optimize': options['optimize']}
+    return {}
+
+
+def convert_file(file_path, output_folder, format_name, format_info, options):
+    """
+    Convert one image. Runs in a worker process, so it only takes picklable
+    arguments (format_info is the entry from UniversalImageConverter.output_formats).
+
+    Returns:
+        (filename, error) - error is None on success
+    """
+    filename = os.path.basename(file_path)
+    try:
+        with Image.open(file_path) as img:
+            # Downscaling: the output size comes from the original dimensions (a draft-reduced
+            # image has a rounded aspect ratio), then the JPEG decoder can skip the full-resolution bitmap
+            max_width = options['max_width']
+            final_size = None
+            if options['resize'] and max_width and img.width > max_width:
+                final_size = fit_width_size(img.size, max_width)
+                reduce_on_load(img, final_size)
+            
+            # Convert mode
+            target_mode = format_info["mode"]
+            
+            if img.mode in ('RGBA', 'LA', 'P') and target_mode == 'RGB':
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                if img.mode == 'P':
+                    img = img.convert('RGBA')
+                background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+                img = background
+            elif img.mode != target_mode:
+                img = img.convert(target_mode)
+            
+            # Resize if needed (final high-quality pass)
+            if final_size:
+                img = img.resize(final_size, Image.LANCZOS)
+            
+            # Save
+            base_name = Path(filename).stem
+            output_filename = f"{base_name}{format_info['ext']}"
+            output_path = os.path.join(output_folder, output_filename)
+            
+            img.save(output_path, format=format_name, **build_save_options(format_name, options))
+        return filename, None
+    except Exception as e:
+        return filename, str(e)
+
 
 class UniversalImageConverter(ctk.CTk):
     def __init__(self):
@@ -23,6 +92,7 @@ class UniversalImageConverter(ctk.CTk):
         self.output_folder = ""
         self.selected_files = []
         self.selection_mode = "folder"
+        self.workers = os.cpu_count() or 1
         
         # Supported formats
         self.output_formats = {
@@ -312,6 +382,33 @@ class UniversalImageConverter(ctk.CTk):
         )
         self.optimize_checkbox.pack(side="right")
         
+        # Parallel workers
+        workers_frame = ctk.CTkFrame(step3_content, fg_color="transparent")
+        workers_frame.pack(fill="x", pady=(12, 0))
+        
+        ctk.CTkLabel(
+            workers_frame,
+            text="Worker Processes:",
+            font=ctk.CTkFont(size=14)
+        ).pack(side="left")
+        
+        self.workers_entry = ctk.CTkEntry(
+            workers_frame,
+            placeholder_text=str(os.cpu_count() or 1),
+            width=80,
+            font=ctk.CTkFont(size=14),
+            height=35
+        )
+        self.workers_entry.insert(0, str(os.cpu_count() or 1))
+        self.workers_entry.pack(side="left", padx=(8, 5))
+        
+        ctk.CTkLabel(
+            workers_frame,
+            text="(1 = one file at a time)",
+            font=ctk.CTkFont(size=13),
+            text_color="gray"
+        ).pack(side="left")
+        
         # Format-specific options container
         self.format_options_container = ctk.CTkFrame(step3_content, fg_color="transparent")
         self.format_options_container.pack(fill="x", pady=(12, 0))
@@ -520,6 +617,14 @@ class UniversalImageConverter(ctk.CTk):
                 messagebox.showerror("Error", "Please enter a valid width")
                 return
         
+        try:
+            self.workers = int(self.workers_entry.get())
+            if self.workers <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid number of worker processes")
+            return
+        
         # Start processing
         self.start_button.configure(state="disabled")
         self.progress_bar.set(0)
@@ -528,6 +633,47 @@ class UniversalImageConverter(ctk.CTk):
         thread = threading.Thread(target=self.process_images, daemon=True)
         thread.start()
     
+    def show_progress(self, done, total):
+        self.progress_bar.set(done / total)
+        self.progress_label.configure(text=f"Converting: {done}/{total}")
+    
+    def iter_conversions(self, image_files, format_name, format_info, options, workers):
+        """Yield (filename, error) per file in completion order, with a bounded in-flight window."""
+        if workers <= 1:
+            for file_path in image_files:
+                yield convert_file(file_path, self.output_folder, format_name, format_info, options)
+            return
+        
+        window = workers * 4  # Enough queued work to keep every core busy, never the whole folder
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = {}  # future -> filename
+            for file_path in image_files:
+                filename = os.path.basename(file_path)
+                try:
+                    future = executor.submit(
+                        convert_file, file_path, self.output_folder, format_name, format_info, options
+                    )
+                except Exception as e:
+                    # The pool broke earlier; report the remaining files instead of aborting
+                    yield filename, str(e)
+                    continue
+                in_flight[future] = filename
+                if len(in_flight) >= window:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield self._future_result(future, in_flight.pop(future))
+            for future in as_completed(list(in_flight)):
+                yield self._future_result(future, in_flight.pop(future))
+    
+    @staticmethod
+    def _future_result(future, filename):
+        """The worker's (filename, error), or the crash itself as this file's error."""
+        try:
+            return future.result()
+        except Exception as e:
+            # Worker crashed (e.g. a decoder segfault) or the pool broke
+            return filename, str(e)
+    
     def process_images(self):
         try:
             # Get image files
@@ -556,65 +702,36 @@ class UniversalImageConverter(ctk.CTk):
             max_width = int(self.width_entry.get()) if resize else None
             webp_method = int(self.webp_method_slider.get())
             png_compress = int(self.png_compress_slider.get())
+            workers = max(1, min(self.workers, total))
+            
+            options = {
+                'quality': quality,
+                'optimize': optimize,
+                'resize': resize,
+                'max_width': max_width,
+                'webp_method': webp_method,
+                'png_compress': png_compress
+            }
             
             os.makedirs(self.output_folder, exist_ok=True)
             
             processed = 0
             errors = 0
+            last_update = 0.0
             
-            for index, file_path in enumerate(image_files):
-                try:
-                    filename = os.path.basename(file_path)
-                    
-                    with Image.open(file_path) as img:
-                        # Convert mode
-                        target_mode = format_info["mode"]
-                        
-                        if img.mode in ('RGBA', 'LA', 'P') and target_mode == 'RGB':
-                            background = Image.new('RGB', img.size, (255, 255, 255))
-                            if img.mode == 'P':
-                                img = img.convert('RGBA')
-                            background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                            img = background
-                        elif img.mode != target_mode:
-                            img = img.convert(target_mode)
-                        
-                        # Resize if needed
-                        if resize and max_width and img.width > max_width:
-                            aspect_ratio = img.height / img.width
-                            new_height = int(max_width * aspect_ratio)
-                            img = img.resize((max_width, new_height), Image.LANCZOS)
-                        
-                        # Save
-                        base_name = Path(filename).stem
-                        output_filename = f"{base_name}{format_info['ext']}"
-                        output_path = os.path.join(self.output_folder, output_filename)
-                        
-                        save_options = {}
-                        
-                        if format_name == "JPEG":
-                            save_options = {'quality': quality, 'optimize': optimize, 'progressive': True}
-                        elif format_name == "PNG":
-                            save_options = {'optimize': optimize, 'compress_level': png_compress}
-                        elif format_name == "WEBP":
-                            save_options = {'quality': quality, 'method': webp_method, 'lossless': False}
-                        elif format_name == "TIFF":
-                            save_options = {'quality': quality, 'compression': 'jpeg'}
-                        elif format_name == "GIF":
-                            save_options = {'optimize': optimize}
-                        
-                        img.save(output_path, format=format_name, **save_options)
-                        processed += 1
-                        
-                except Exception as e:
-                    print(f"Error: {filename}: {str(e)}")
+            results = self.iter_conversions(image_files, format_name, format_info, options, workers)
+            for done, (filename, error) in enumerate(results, start=1):
+                if error is None:
+                    processed += 1
+                else:
+                    print(f"Error: {filename}: {error}")
                     errors += 1
                 
-                # Update progress
-                progress = (index + 1) / total
-                self.after(0, lambda p=progress: self.progress_bar.set(p))
-                self.after(0, lambda i=index+1, t=total: 
-                          self.progress_label.configure(text=f"Converting: {i}/{t}"))
+                # Coalesce progress: one Tk callback per PROGRESS_INTERVAL, plus the last one
+                now = time.perf_counter()
+                if now - last_update >= PROGRESS_INTERVAL or done == total:
+                    last_update = now
+                    self.after(0, self.show_progress, done, total)
             
             # Done
             message = f"✅ Conversion Complete!\n\n{processed} images converted"
@@ -630,5 +747,6 @@ class UniversalImageConverter(ctk.CTk):
             self.after(0, lambda: self.progress_label.configure(text="Complete"))
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = UniversalImageConverter()
     app.mainloop()
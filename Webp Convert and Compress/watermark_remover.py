@@ -12,10 +12,14 @@ Features:
 
 Requirements:
     pip install opencv-python opencv-contrib-python numpy pillow tqdm
+    pip install onnxruntime  (optional, for the 'ai' algorithm with an ONNX model)
 """
 
 import os
 import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import cv2
 import numpy as np
 from pathlib import Path
@@ -27,12 +31,57 @@ import json
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import threading
+from onnx_inpaint import OnnxInpainter
+
+
+# Pixels of context kept around each mask region (covers the inpaint radius and the 21 px denoise search window)
+ROI_PADDING = 32
+
+# Processed pixels are blended back over this distance around the mask; beyond it the original is kept
+BLEND_RADIUS = 8
+
+# Preprocess denoising: 'full' denoises each whole region crop, 'band' only the tiles touching a
+# band around the mask (the pixels inpainting reads and the blend keeps), 'off' skips it
+DENOISE_MODES = ('full', 'band', 'off')
+DENOISE_BAND = 5 + BLEND_RADIUS  # Largest inpaint radius plus the blend distance
+DENOISE_TILE = 64
+DENOISE_CONTEXT = 13  # Half the 21 px search window plus half the 7 px template: tiles match a full denoise
+
+# If the padded regions cover more than this fraction of the frame, process the frame in one piece
+FULL_FRAME_RATIO = 0.5
+
+# OpenCV methods and radius per algorithm, and the extra context kept around each mask component
+# so a crop inpaints exactly like the whole image. 'ai' is the enhanced Telea fallback: one pass at
+# radius 5. Telea barely reads the pixels under the mask, so repeated passes with the same mask
+# reproduce the first one to within a few levels
+INPAINT_METHODS = {
+    'telea': (cv2.INPAINT_TELEA,),
+    'ns': (cv2.INPAINT_NS,),
+    'mixed': (cv2.INPAINT_TELEA, cv2.INPAINT_NS),
+    'ai': (cv2.INPAINT_TELEA,),
+}
+INPAINT_RADIUS = {'telea': 3, 'ns': 3, 'mixed': 3, 'ai': 5}
+INPAINT_MARGIN = 2
+
+# Auto-detection runs on a pyramid level whose longer side is at most this
+DETECT_MAX_SIDE = 2048
+
+# Template-mask mode: pixels searched around the expected watermark position, the minimum
+# normalized correlation to accept a shift, and the largest mask box (fraction of the frame)
+# still used as a matching patch
+TEMPLATE_SEARCH_MARGIN = 24
+TEMPLATE_MIN_SCORE = 0.5
+TEMPLATE_MAX_AREA = 0.25
+
+# GUI mask painting: canvas redraws are coalesced to at most one per display frame (~60 fps)
+PAINT_FRAME_MS = 16
 
 
 class WatermarkRemover:
     """Professional watermark removal using multiple AI techniques."""
     
-    def __init__(self, algorithm: str = 'telea'):
+    def __init__(self, algorithm: str = 'telea', denoise: str = 'full',
+                 model_path: Optional[str] = None, onnx_threads: int = 0):
         """
         Initialize the watermark remover.
         
@@ -41,22 +90,44 @@ class WatermarkRemover:
                 - telea: Fast Marching Method (Telea 2004)
                 - ns: Navier-Stokes based method
                 - mixed: Combines both methods
-                - ai: Deep learning-based (requires model download)
+                - ai: Local ONNX model (model_path), enhanced Telea without one
+            denoise: Preprocess denoising ('full', 'band', 'off')
+                - full: Denoise each whole region crop (best quality)
+                - band: Denoise only around the mask edge (fast)
+                - off: No denoising (fastest)
+            model_path: LaMa-class .onnx inpainting model for 'ai'
+            onnx_threads: Intra-op threads for the model (0 = all cores)
         """
         self.algorithm = algorithm.lower()
+        self.model_path = model_path
+        self.onnx_threads = onnx_threads
+        self.denoise = denoise.lower()
+        if self.denoise not in DENOISE_MODES:
+            raise ValueError(f"Unknown denoise mode: {denoise}")
         self.mask = None
         self.drawing = False
         self.brush_size = 15
         self.current_image = None
+        self.last_timings = {}  # Seconds per stage for the last remove_watermark call
         
         # Supported formats
         self.supported_formats = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tiff', '.tif'}
         
-        print(f"[✓] Watermark Remover initialized with '{self.algorithm}' algorithm")
+        print(f"[✓] Watermark Remover initialized with '{self.algorithm}' algorithm, denoise '{self.denoise}'")
+        
+        # Pluggable backend for 'ai': any object with inpaint(img, mask) and a context size in pixels
+        self.inpainter = None
+        if self.algorithm == 'ai' and model_path:
+            self.inpainter = OnnxInpainter(model_path, threads=onnx_threads)
+            print(f"[✓] Using ONNX model {os.path.basename(model_path)} "
+                  f"({self.inpainter.tile_size[1]}x{self.inpainter.tile_size[0]} tiles)")
+        elif self.algorithm == 'ai':
+            print("[!] AI mode selected without a model. Using enhanced Telea as fallback.")
     
     def remove_watermark(self, image_path: str, mask_path: Optional[str] = None, 
                         output_path: Optional[str] = None, 
-                        interactive: bool = False) -> str:
+                        interactive: bool = False,
+                        mask_template: Optional[dict] = None) -> str:
         """
         Remove watermark from an image.
         
@@ -65,22 +136,53 @@ class WatermarkRemover:
             mask_path: Path to the mask image (white = watermark area)
             output_path: Path for the output image
             interactive: Enable interactive mask drawing
+            mask_template: Template from make_mask_template, aligned to this image
+                           and used when no mask_path is given
         
         Returns:
             Path to the processed image
         """
+        timings = {}
+        self.last_timings = timings
+        start = time.perf_counter()
+        
         # Load image
         img = cv2.imread(image_path)
         if img is None:
             raise ValueError(f"Failed to load image: {image_path}")
         
         self.current_image = img.copy()
+        start = _lap(timings, 'load', start)
+        
+        mask = self._get_mask(img, mask_path, interactive, mask_template)
+        _lap(timings, 'mask', start)
+        
+        # Preprocess, inpaint and postprocess the mask regions only
+        result = self.inpaint_regions(img, mask, timings)
         
-        # Get or create mask
+        # Save result
+        start = time.perf_counter()
+        if output_path is None:
+            base, ext = os.path.splitext(image_path)
+            output_path = f"{base}_no_watermark{ext}"
+        
+        cv2.imwrite(output_path, result, [cv2.IMWRITE_JPEG_QUALITY, 95, 
+                                          cv2.IMWRITE_PNG_COMPRESSION, 3])
+        _lap(timings, 'save', start)
+        
+        print(f"[✓] Processed: {os.path.basename(output_path)}")
+        return output_path
+    
+    def _get_mask(self, img: np.ndarray, mask_path: Optional[str] = None, interactive: bool = False,
+                  mask_template: Optional[dict] = None) -> np.ndarray:
+        """Binary mask for img: from mask_path, the template mask, drawing, or auto-detection."""
         if mask_path and os.path.exists(mask_path):
             mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
             if mask.shape[:2] != img.shape[:2]:
                 mask = cv2.resize(mask, (img.shape[1], img.shape[0]))
+        elif mask_template is not None:
+            # Template mode: reuse the batch mask, aligned to this image
+            mask = self.align_mask_template(mask_template, img)
         elif interactive:
             mask = self._create_interactive_mask(img)
         else:
@@ -89,33 +191,142 @@ class WatermarkRemover:
         
         # Ensure mask is binary
         _, mask = cv2.threshold(mask, 127, 255, cv2.THRESH_BINARY)
+        return mask
+    
+    def inpaint_regions(self, img: np.ndarray, mask: np.ndarray, timings: Optional[dict] = None) -> np.ndarray:
+        """
+        Run preprocess -> inpaint -> postprocess on padded crops around the
+        mask regions and composite them back. Pixels further than
+        BLEND_RADIUS from the mask keep their original values.
         
-        # Preprocess
-        img_preprocessed = self._preprocess_image(img)
-        
-        # Apply inpainting
-        result = self._apply_inpainting(img_preprocessed, mask)
-        
-        # Postprocess
-        result = self._postprocess_image(result, img)
-        
-        # Save result
-        if output_path is None:
-            base, ext = os.path.splitext(image_path)
-            output_path = f"{base}_no_watermark{ext}"
-        
-        cv2.imwrite(output_path, result, [cv2.IMWRITE_JPEG_QUALITY, 95, 
-                                          cv2.IMWRITE_PNG_COMPRESSION, 3])
+        Args:
+            img: BGR image
+            mask: Binary mask (255 = watermark)
+            timings: Optional dict; seconds spent per stage are added to it
         
-        print(f"[✓] Processed: {os.path.basename(output_path)}")
-        return output_path
+        Returns:
+            Processed copy of img
+        """
+        if timings is None:
+            timings = {}
+        # A model backend sees only the crop, so give it the context it asks for
+        padding = max(ROI_PADDING, self.inpainter.context) if self.inpainter is not None else ROI_PADDING
+        result = img.copy()
+        for x0, y0, x1, y1 in self._mask_rois(mask, padding):
+            crop = img[y0:y1, x0:x1]
+            crop_mask = mask[y0:y1, x0:x1]
+            
+            start = time.perf_counter()
+            processed = self._preprocess_image(crop, crop_mask)
+            start = _lap(timings, 'denoise', start)
+            processed = self._apply_inpainting(processed, crop_mask)
+            start = _lap(timings, 'inpaint', start)
+            processed = self._postprocess_image(processed, crop)
+            start = _lap(timings, 'postprocess', start)
+            
+            result[y0:y1, x0:x1] = self._blend_near_mask(processed, crop, crop_mask)
+            _lap(timings, 'blend', start)
+        return result
+    
+    def _mask_rois(self, mask: np.ndarray, padding: int = ROI_PADDING) -> List[Tuple[int, int, int, int]]:
+        """Padded, non-overlapping bounding boxes (x0, y0, x1, y1) of the mask regions."""
+        h, w = mask.shape[:2]
+        count, _, stats, _ = cv2.connectedComponentsWithStats((mask > 0).astype(np.uint8), connectivity=8)
+        boxes = []
+        for x, y, bw, bh, _ in stats[1:]:
+            boxes.append([max(0, x - padding), max(0, y - padding),
+                          min(w, x + bw + padding), min(h, y + bh + padding)])
+        
+        # Merge overlapping boxes until none overlap
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(boxes)):
+                for j in range(i + 1, len(boxes)):
+                    a, b = boxes[i], boxes[j]
+                    if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                        boxes[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                        del boxes[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        
+        if sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in boxes) > FULL_FRAME_RATIO * w * h:
+            return [(0, 0, w, h)]
+        return [tuple(box) for box in boxes]
     
-    def _preprocess_image(self, img: np.ndarray) -> np.ndarray:
+    def _blend_near_mask(self, processed: np.ndarray, original: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """Processed pixels on and near the mask, feathered into the original over BLEND_RADIUS."""
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (BLEND_RADIUS + 1, BLEND_RADIUS + 1))
+        near = cv2.dilate(mask, kernel)
+        alpha = cv2.GaussianBlur(near, (0, 0), BLEND_RADIUS / 6)
+        alpha = cv2.max(alpha, mask)  # Fully processed on the mask itself
+        alpha = alpha.astype(np.float32)[:, :, None] / 255.0
+        blended = processed * alpha + original * (1.0 - alpha)
+        return np.clip(blended + 0.5, 0, 255).astype(np.uint8)
+    
+    def _preprocess_image(self, img: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
         """Apply preprocessing to improve inpainting quality."""
+        if self.denoise == 'off':
+            return img
+        if self.denoise == 'band' and mask is not None:
+            return self._denoise_band(img, mask)
         # Denoise slightly
         denoised = cv2.fastNlMeansDenoisingColored(img, None, 3, 3, 7, 21)
         return denoised
     
+    def _denoise_band(self, img: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        Denoise only the pixels within DENOISE_BAND outside the mask. Pixels
+        under the mask are replaced by inpainting and pixels beyond the band
+        are never blended back, so neither needs denoising.
+        
+        The band is covered with DENOISE_TILE tiles. Dense groups of tiles are
+        denoised as one box, sparse ones (thin or diagonal strokes) one run of
+        tiles per row. Each box gets DENOISE_CONTEXT pixels of context, which
+        gives the same values as denoising the whole image.
+        """
+        size = 2 * DENOISE_BAND + 1
+        band = cv2.dilate(mask, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (size, size)))
+        band[mask > 0] = 0
+        
+        h, w = band.shape
+        tiles = np.maximum.reduceat(band, np.arange(0, h, DENOISE_TILE), axis=0)
+        tiles = np.maximum.reduceat(tiles, np.arange(0, w, DENOISE_TILE), axis=1)
+        
+        # Boxes (row0, row1, col0, col1) in tile units
+        boxes = []
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(tiles, connectivity=8)
+        for label in range(1, count):
+            x, y, box_w, box_h, area = stats[label]
+            if area * 2 >= box_w * box_h:
+                boxes.append((y, y + box_h, x, x + box_w))
+                continue
+            for row in range(y, y + box_h):
+                in_group = (labels[row, x:x + box_w] == label).view(np.int8)
+                edges = np.flatnonzero(np.diff(np.concatenate(([0], in_group, [0]))))
+                boxes.extend((row, row + 1, x + c0, x + c1) for c0, c1 in zip(edges[::2], edges[1::2]))
+        
+        regions = []
+        for row0, row1, col0, col1 in boxes:
+            y0, y1 = row0 * DENOISE_TILE, min(h, row1 * DENOISE_TILE)
+            x0, x1 = col0 * DENOISE_TILE, min(w, col1 * DENOISE_TILE)
+            cy0, cy1 = max(0, y0 - DENOISE_CONTEXT), min(h, y1 + DENOISE_CONTEXT)
+            cx0, cx1 = max(0, x0 - DENOISE_CONTEXT), min(w, x1 + DENOISE_CONTEXT)
+            regions.append((y0, y1, x0, x1, cy0, cy1, cx0, cx1))
+        
+        # A tight crop is cheaper to denoise once than as boxes with overlapping context
+        if sum((cy1 - cy0) * (cx1 - cx0) for *_, cy0, cy1, cx0, cx1 in regions) >= h * w:
+            regions = [(0, h, 0, w, 0, h, 0, w)]
+        
+        result = img.copy()
+        for y0, y1, x0, x1, cy0, cy1, cx0, cx1 in regions:
+            denoised = cv2.fastNlMeansDenoisingColored(img[cy0:cy1, cx0:cx1], None, 3, 3, 7, 21)
+            inner = denoised[y0 - cy0:y1 - cy0, x0 - cx0:x1 - cx0]
+            np.copyto(result[y0:y1, x0:x1], inner, where=band[y0:y1, x0:x1, None] > 0)
+        return result
+    
     def _postprocess_image(self, result: np.ndarray, original: np.ndarray) -> np.ndarray:
         """Apply postprocessing to blend result with original."""
         # Slight sharpening
@@ -124,8 +335,8 @@ class WatermarkRemover:
                           [-1,-1,-1]]) * 0.3
         sharpened = cv2.filter2D(result, -1, kernel)
         
-        # Blend with original sharpening
-        result = cv2.addWeighted(result, 0.85, sharpened, 0.15, 0)
+        # Blend with original sharpening (into the sharpened buffer, no extra copy)
+        result = cv2.addWeighted(result, 0.85, sharpened, 0.15, 0, dst=sharpened)
         
         # Match color distribution to original
         result = self._match_color_distribution(result, original)
@@ -133,132 +344,215 @@ class WatermarkRemover:
         return result
     
     def _match_color_distribution(self, result: np.ndarray, original: np.ndarray) -> np.ndarray:
-        """Match color distribution between result and original."""
-        result_float = result.astype(np.float32)
-        original_float = original.astype(np.float32)
-        
-        for i in range(3):  # For each color channel
-            result_mean = np.mean(result_float[:, :, i])
-            result_std = np.std(result_float[:, :, i])
-            original_mean = np.mean(original_float[:, :, i])
-            original_std = np.std(original_float[:, :, i])
-            
-            if result_std > 0:
-                result_float[:, :, i] = (result_float[:, :, i] - result_mean) * (original_std / result_std) + original_mean
-        
-        return np.clip(result_float, 0, 255).astype(np.uint8)
-    
-    def _apply_inpainting(self, img: np.ndarray, mask: np.ndarray) -> np.ndarray:
-        """Apply the selected inpainting algorithm."""
-        if self.algorithm == 'telea':
-            result = cv2.inpaint(img, mask, 3, cv2.INPAINT_TELEA)
-        
-        elif self.algorithm == 'ns':
-            result = cv2.inpaint(img, mask, 3, cv2.INPAINT_NS)
+        """
+        Match color distribution between result and original, in place.
         
-        elif self.algorithm == 'mixed':
-            # Combine both methods for better results
-            result_telea = cv2.inpaint(img, mask, 3, cv2.INPAINT_TELEA)
-            result_ns = cv2.inpaint(img, mask, 3, cv2.INPAINT_NS)
-            result = cv2.addWeighted(result_telea, 0.5, result_ns, 0.5, 0)
+        Per-channel mean and std come from one cv2.meanStdDev pass over each
+        image, and the linear correction is applied through a 256-entry
+        lookup table per channel, so no float copy of either image is made.
+        """
+        result_mean, result_std = cv2.meanStdDev(result)
+        original_mean, original_std = cv2.meanStdDev(original)
         
-        elif self.algorithm == 'ai':
-            # Deep learning-based inpainting (placeholder for future enhancement)
-            print("[!] AI mode selected. Using enhanced Telea as fallback.")
-            # Apply multiple passes for better quality
-            result = img.copy()
-            for _ in range(3):
-                result = cv2.inpaint(result, mask, 5, cv2.INPAINT_TELEA)
+        # value * gain + offset per channel; flat channels are left as they are
+        flat = result_std == 0
+        gain = np.where(flat, 1.0, original_std / np.where(flat, 1.0, result_std))
+        offset = np.where(flat, 0.0, original_mean - result_mean * gain)
         
-        else:
+        values = np.arange(256, dtype=np.float64)[:, None]
+        lut = np.clip(values * gain.T + offset.T, 0, 255).astype(np.uint8)
+        return cv2.LUT(result, lut.reshape(256, 1, 3), dst=result)
+    
+    def _apply_inpainting(self, img: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        Apply the selected inpainting algorithm.
+        
+        The mask components are found once and each is inpainted on a tight
+        crop (inpaint radius plus INPAINT_MARGIN), which gives the same pixels
+        as inpainting the whole image. cv2.inpaint is single-threaded and
+        releases the GIL, so the crops, and for 'mixed' the Telea and
+        Navier-Stokes passes over the same crop, run side by side on up to
+        cv2.getNumThreads() threads.
+        """
+        if self.algorithm not in INPAINT_METHODS:
             raise ValueError(f"Unknown algorithm: {self.algorithm}")
+        if self.inpainter is not None:
+            return self.inpainter.inpaint(img, mask)
+        radius = INPAINT_RADIUS[self.algorithm]
+        methods = INPAINT_METHODS[self.algorithm]
+        boxes = self._mask_rois(mask, padding=radius + INPAINT_MARGIN)
+        
+        def inpaint(job):
+            (x0, y0, x1, y1), method = job
+            return cv2.inpaint(img[y0:y1, x0:x1], mask[y0:y1, x0:x1], radius, method)
+        
+        jobs = [(box, method) for box in boxes for method in methods]
+        threads = min(len(jobs), max(1, cv2.getNumThreads()))
+        if threads > 1:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                outputs = list(executor.map(inpaint, jobs))
+        else:
+            outputs = [inpaint(job) for job in jobs]
+        
+        result = img.copy()
+        for i, (x0, y0, x1, y1) in enumerate(boxes):
+            passes = outputs[i * len(methods):(i + 1) * len(methods)]
+            if len(passes) == 2:
+                # Mixed: combine both methods for better results
+                result[y0:y1, x0:x1] = cv2.addWeighted(passes[0], 0.5, passes[1], 0.5, 0)
+            else:
+                result[y0:y1, x0:x1] = passes[0]
         
         return result
     
     def _auto_detect_watermark(self, img: np.ndarray, aggressive: bool = True) -> np.ndarray:
-        """Automatically detect watermark regions using advanced techniques."""
+        """
+        Automatically detect watermark regions using advanced techniques.
+        
+        Detection runs on a pyramid level no larger than DETECT_MAX_SIDE, with
+        every detector writing 8-bit masks into shared buffers; only the final
+        mask is upsampled to full resolution.
+        """
         print("[⚡] Auto-detecting watermark...")
         
+        h, w = img.shape[:2]
+        scale = min(1.0, DETECT_MAX_SIDE / max(h, w))
+        small = img if scale == 1.0 else cv2.resize(img, (max(1, round(w * scale)), max(1, round(h * scale))),
+                                                    interpolation=cv2.INTER_AREA)
+        
         # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        combined = np.empty_like(gray)
+        scratch = np.empty_like(gray)
         
         # Method 1: Edge detection for text/logo watermarks
-        edges = cv2.Canny(gray, 30, 100)
+        cv2.Canny(gray, 30, 100, edges=combined)
         kernel_edge = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        edges_dilated = cv2.dilate(edges, kernel_edge, iterations=1)
+        cv2.dilate(combined, kernel_edge, dst=combined, iterations=1)
         
-        # Method 2: High-frequency detection (typical for watermarks)
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-        laplacian = np.absolute(laplacian).astype(np.uint8)
-        _, freq_mask = cv2.threshold(laplacian, 20, 255, cv2.THRESH_BINARY)
+        # Method 2: High-frequency detection (typical for watermarks), 16-bit instead of float64
+        laplacian = cv2.Laplacian(gray, cv2.CV_16S)
+        cv2.convertScaleAbs(laplacian, dst=scratch)
+        del laplacian
+        cv2.threshold(scratch, 20, 255, cv2.THRESH_BINARY, dst=scratch)
+        cv2.bitwise_or(combined, scratch, dst=combined)
         
         # Method 3: Detect semi-transparent overlays using variance
-        blur = cv2.GaussianBlur(gray, (5, 5), 0)
-        variance = cv2.absdiff(gray, blur)
-        _, var_mask = cv2.threshold(variance, 15, 255, cv2.THRESH_BINARY)
+        cv2.GaussianBlur(gray, (5, 5), 0, dst=scratch)
+        cv2.absdiff(gray, scratch, dst=scratch)
+        cv2.threshold(scratch, 15, 255, cv2.THRESH_BINARY, dst=scratch)
+        cv2.bitwise_or(combined, scratch, dst=combined)
         
         # Method 4: Detect bright/dark spots that differ from background
-        mean_val = np.mean(gray)
-        std_val = np.std(gray)
-        lower = mean_val - 1.5 * std_val
-        upper = mean_val + 1.5 * std_val
-        outliers = np.logical_or(gray < lower, gray > upper).astype(np.uint8) * 255
-        
-        # Method 5: Detect corners (common in watermark logos)
-        corners = cv2.cornerHarris(gray.astype(np.float32), 2, 3, 0.04)
+        mean_val, std_val = (v[0][0] for v in cv2.meanStdDev(gray))
+        cv2.inRange(gray, mean_val - 1.5 * std_val, mean_val + 1.5 * std_val, dst=scratch)
+        cv2.bitwise_not(scratch, dst=scratch)
+        cv2.bitwise_or(combined, scratch, dst=combined)
+        
+        # Method 5: Detect corners (common in watermark logos); float32 only at detection size
+        corners = cv2.cornerHarris(gray, 2, 3, 0.04)
         corners = cv2.dilate(corners, None)
-        corner_mask = (corners > 0.01 * corners.max()).astype(np.uint8) * 255
-        
-        # Combine all detection methods
-        combined = cv2.bitwise_or(edges_dilated, freq_mask)
-        combined = cv2.bitwise_or(combined, var_mask)
-        combined = cv2.bitwise_or(combined, outliers)
-        combined = cv2.bitwise_or(combined, corner_mask)
-        
-        # Focus on common watermark locations (corners and edges)
-        h, w = gray.shape
-        location_weight = np.ones_like(gray, dtype=np.float32) * 0.3
-        
-        # Increase weight in corners and edges
-        corner_size_h, corner_size_w = h // 4, w // 4
-        # Top-left
-        location_weight[0:corner_size_h, 0:corner_size_w] = 1.5
-        # Top-right
-        location_weight[0:corner_size_h, w-corner_size_w:w] = 1.5
-        # Bottom-left
-        location_weight[h-corner_size_h:h, 0:corner_size_w] = 1.5
-        # Bottom-right
-        location_weight[h-corner_size_h:h, w-corner_size_w:w] = 1.5
-        # Center (some watermarks are centered)
-        location_weight[h//3:2*h//3, w//3:2*w//3] = 1.2
-        
-        # Apply location weighting
-        combined_float = combined.astype(np.float32) * location_weight
-        combined = np.clip(combined_float, 0, 255).astype(np.uint8)
-        
-        # Threshold to get binary mask
-        _, mask = cv2.threshold(combined, 50, 255, cv2.THRESH_BINARY)
+        cv2.compare(corners, 0.01 * float(corners.max()), cv2.CMP_GT, dst=scratch)
+        del corners
+        cv2.bitwise_or(combined, scratch, dst=combined)
+        
+        # (The old corner/centre location weighting kept every detected pixel above the
+        # threshold, so the combined detections are the mask as they are.)
+        mask = combined
         
         # Morphological operations to clean up and connect regions
         kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=2)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=1)
+        cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, dst=mask, iterations=2)
+        cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, dst=mask, iterations=1)
         
         # Remove very small regions (likely noise)
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        min_area = (w * h) * 0.0001  # At least 0.01% of image
-        for contour in contours:
-            if cv2.contourArea(contour) < min_area:
-                cv2.drawContours(mask, [contour], -1, 0, -1)
-        
-        # If aggressive mode, dilate more to ensure watermark is covered
+        small_h, small_w = mask.shape
+        min_area = (small_w * small_h) * 0.0001  # At least 0.01% of image
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        keep = (stats[:, cv2.CC_STAT_AREA] >= min_area).astype(np.uint8) * 255
+        keep[0] = 0
+        mask = keep[labels]
+        del labels
+        
+        # If aggressive mode, dilate more to ensure watermark is covered (two 7x7 passes at full size)
         if aggressive:
-            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7))
-            mask = cv2.dilate(mask, kernel, iterations=2)
+            radius = max(1, round(6 * scale))
+            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * radius + 1, 2 * radius + 1))
+            cv2.dilate(mask, kernel, dst=mask)
+        
+        # Upsample only the final mask
+        if scale != 1.0:
+            mask = cv2.resize(mask, (w, h), interpolation=cv2.INTER_LINEAR)
+            cv2.threshold(mask, 127, 255, cv2.THRESH_BINARY, dst=mask)
         
         print("[✓] Auto-detection complete")
         return mask
     
+    def make_mask_template(self, mask: np.ndarray, reference: Optional[np.ndarray] = None) -> dict:
+        """
+        Build a reusable mask for a batch where the watermark sits in the same place.
+        
+        Args:
+            mask: Mask for the reference image (white = watermark area)
+            reference: The image the mask was made for; enables template matching
+                       in align_mask_template (size-ratio alignment only without it)
+        
+        Returns:
+            Template dict for align_mask_template
+        """
+        _, mask = cv2.threshold(mask, 127, 255, cv2.THRESH_BINARY)
+        h, w = mask.shape[:2]
+        template = {'mask': mask, 'size': (w, h), 'box': None, 'patch': None}
+        
+        points = cv2.findNonZero(mask)
+        if reference is not None and points is not None:
+            x, y, bw, bh = cv2.boundingRect(points)
+            if bw * bh <= TEMPLATE_MAX_AREA * w * h:
+                gray = cv2.cvtColor(reference[y:y + bh, x:x + bw], cv2.COLOR_BGR2GRAY)
+                template['box'] = (x, y, x + bw, y + bh)
+                template['patch'] = gray
+        return template
+    
+    def align_mask_template(self, template: dict, img: np.ndarray) -> np.ndarray:
+        """
+        Fit a template mask to img: scale by the size ratio, then (if the template
+        has a patch) shift it to the best match within TEMPLATE_SEARCH_MARGIN.
+        """
+        h, w = img.shape[:2]
+        template_w, template_h = template['size']
+        mask = template['mask']
+        if (w, h) != (template_w, template_h):
+            mask = cv2.resize(mask, (w, h), interpolation=cv2.INTER_NEAREST)
+        if template['patch'] is None:
+            return mask
+        
+        # Expected position, scaled like the mask
+        scale_x, scale_y = w / template_w, h / template_h
+        bx0, by0, bx1, by1 = template['box']
+        x0, y0 = int(bx0 * scale_x), int(by0 * scale_y)
+        x1, y1 = max(x0 + 1, int(bx1 * scale_x)), max(y0 + 1, int(by1 * scale_y))
+        patch = template['patch']
+        if patch.shape[:2] != (y1 - y0, x1 - x0):
+            patch = cv2.resize(patch, (x1 - x0, y1 - y0), interpolation=cv2.INTER_AREA)
+        
+        # Search only a small window around it
+        margin = TEMPLATE_SEARCH_MARGIN
+        wx0, wy0 = max(0, x0 - margin), max(0, y0 - margin)
+        wx1, wy1 = min(w, x1 + margin), min(h, y1 + margin)
+        if wx1 - wx0 < patch.shape[1] or wy1 - wy0 < patch.shape[0]:
+            return mask
+        window = cv2.cvtColor(img[wy0:wy1, wx0:wx1], cv2.COLOR_BGR2GRAY)
+        scores = cv2.matchTemplate(window, patch, cv2.TM_CCOEFF_NORMED)
+        _, best, _, (match_x, match_y) = cv2.minMaxLoc(scores)
+        if best < TEMPLATE_MIN_SCORE:
+            return mask
+        
+        dx, dy = wx0 + match_x - x0, wy0 + match_y - y0
+        if dx or dy:
+            shift = np.float32([[1, 0, dx], [0, 1, dy]])
+            mask = cv2.warpAffine(mask, shift, (w, h), flags=cv2.INTER_NEAREST)
+        return mask
+    
     def _create_interactive_mask(self, img: np.ndarray) -> np.ndarray:
         """Create mask through interactive drawing."""
         print("\n=== Interactive Mask Creation ===")
@@ -340,7 +634,9 @@ class WatermarkRemover:
         return self.mask
     
     def batch_process(self, input_dir: str, output_dir: Optional[str] = None,
-                     mask_dir: Optional[str] = None, recursive: bool = False) -> List[str]:
+                     mask_dir: Optional[str] = None, recursive: bool = False,
+                     workers: int = 1, template: bool = False,
+                     template_mask: Optional[str] = None) -> List[str]:
         """
         Process multiple images in batch.
         
@@ -349,6 +645,10 @@ class WatermarkRemover:
             output_dir: Directory for output images
             mask_dir: Directory containing mask images (optional)
             recursive: Process subdirectories recursively
+            workers: Worker processes (1 = process in this process)
+            template: Detect the watermark once (on the first image) and reuse the
+                      mask for every image, aligned per image
+            template_mask: Load the reusable mask from this file instead of detecting it
         
         Returns:
             List of processed image paths
@@ -364,51 +664,209 @@ class WatermarkRemover:
         output_path.mkdir(parents=True, exist_ok=True)
         
         # Find all images
-        if recursive:
-            image_files = []
-            for ext in self.supported_formats:
-                image_files.extend(input_path.rglob(f"*{ext}"))
-        else:
-            image_files = []
-            for ext in self.supported_formats:
-                image_files.extend(input_path.glob(f"*{ext}"))
+        image_files = self._find_images(input_path, recursive)
         
         if not image_files:
             print(f"[!] No images found in {input_dir}")
             return []
         
         print(f"\n[✓] Found {len(image_files)} images to process")
-        processed_files = []
         
-        for img_file in tqdm(image_files, desc="Processing images"):
-            try:
-                # Determine mask path if mask directory provided
-                mask_path = None
-                if mask_dir:
-                    mask_file = Path(mask_dir) / f"{img_file.stem}_mask{img_file.suffix}"
-                    if mask_file.exists():
-                        mask_path = str(mask_file)
-                
-                # Determine output path
-                rel_path = img_file.relative_to(input_path)
-                out_file = output_path / rel_path
-                out_file.parent.mkdir(parents=True, exist_ok=True)
-                
-                # Process
-                result = self.remove_watermark(
-                    str(img_file),
-                    mask_path=mask_path,
-                    output_path=str(out_file),
-                    interactive=False
-                )
+        # The template only lives for this batch; it is passed to the jobs, not kept on self
+        mask_template = None
+        if template_mask:
+            mask_template = self.load_mask_template(template_mask)
+            print(f"[✓] Using template mask {os.path.basename(template_mask)} for all images")
+        elif template:
+            # Detect on the first image that loads
+            reference_file, reference = None, None
+            for reference_file in image_files:
+                reference = cv2.imread(str(reference_file))
+                if reference is not None:
+                    break
+            if reference is None:
+                raise ValueError(f"No loadable image in {input_dir} to detect the template mask on")
+            mask_template = self.make_mask_template(self._auto_detect_watermark(reference), reference)
+            print(f"[✓] Detected template mask on {reference_file.name}; reusing it for all images")
+        
+        jobs = []
+        for img_file in image_files:
+            # Determine mask path if mask directory provided
+            mask_path = self._mask_file(mask_dir, img_file)
+            
+            # Determine output path
+            rel_path = img_file.relative_to(input_path)
+            out_file = output_path / rel_path
+            out_file.parent.mkdir(parents=True, exist_ok=True)
+            jobs.append((str(img_file), mask_path, str(out_file)))
+        
+        processed_files = []
+        stage_totals = {}
+        start_time = time.time()
+        
+        # Results come back in input order whatever the worker count; failures are reported per file
+        for image_path, result, error, timings in tqdm(self._iter_batch(jobs, workers, mask_template), total=len(jobs),
+                                                       desc="Processing images"):
+            if error:
+                print(f"\n[✗] Failed to process {os.path.basename(image_path)}: {error}")
+            else:
                 processed_files.append(result)
-                
-            except Exception as e:
-                print(f"\n[✗] Failed to process {img_file.name}: {str(e)}")
-                continue
+            for stage, seconds in timings.items():
+                stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
         
-        print(f"\n[✓] Successfully processed {len(processed_files)}/{len(image_files)} images")
+        elapsed = time.time() - start_time
+        print(f"\n[✓] Successfully processed {len(processed_files)}/{len(image_files)} images "
+              f"in {elapsed:.1f}s ({len(jobs) / max(elapsed, 1e-6):.2f} images/s)")
+        print(f"[INFO] Stage totals (all workers): {format_timings(stage_totals)}")
         return processed_files
+    
+    def load_mask_template(self, mask_path: str) -> dict:
+        """Template (see make_mask_template) from a mask image file."""
+        mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
+        if mask is None:
+            raise ValueError(f"Failed to load template mask: {mask_path}")
+        return self.make_mask_template(mask)
+    
+    def _find_images(self, input_path: Path, recursive: bool = False) -> List[Path]:
+        """Images with a supported extension in input_path (and its subfolders if recursive)."""
+        image_files = []
+        for ext in self.supported_formats:
+            image_files.extend(input_path.rglob(f"*{ext}") if recursive else input_path.glob(f"*{ext}"))
+        return image_files
+    
+    def _mask_file(self, mask_dir: Optional[str], img_file: Path) -> Optional[str]:
+        """The <stem>_mask<ext> file for img_file in mask_dir, if there is one."""
+        if mask_dir:
+            mask_file = Path(mask_dir) / f"{img_file.stem}_mask{img_file.suffix}"
+            if mask_file.exists():
+                return str(mask_file)
+        return None
+    
+    def benchmark(self, input_dir: str, algorithms: Tuple[str, ...] = ('telea', 'ai'), limit: int = 10,
+                  mask_dir: Optional[str] = None, recursive: bool = False,
+                  template_mask: Optional[str] = None) -> dict:
+        """
+        Compare inpainting throughput of several algorithms on the same images.
+        
+        Masks are made once per image (mask_dir, template_mask or auto-detect)
+        and shared, so only preprocess -> inpaint -> postprocess is timed, in
+        this process. Each algorithm gets one untimed warm-up image (model
+        load, first-run allocations). Nothing is written.
+        
+        Args:
+            input_dir: Directory containing input images
+            algorithms: Algorithms to compare; 'ai' uses this remover's model
+            limit: Number of images to time
+            mask_dir: Directory containing mask images (optional)
+            recursive: Include subdirectories
+            template_mask: Mask file reused (aligned) for images without a mask_dir mask
+        
+        Returns:
+            Images per second for each algorithm
+        """
+        mask_template = self.load_mask_template(template_mask) if template_mask else None
+        samples = []
+        for img_file in self._find_images(Path(input_dir), recursive):
+            if len(samples) >= limit:
+                break
+            img = cv2.imread(str(img_file))
+            if img is not None:
+                samples.append((img, self._get_mask(img, self._mask_file(mask_dir, img_file),
+                                                    mask_template=mask_template)))
+        if not samples:
+            print(f"[!] No images found in {input_dir}")
+            return {}
+        
+        print(f"\n[✓] Benchmarking {', '.join(algorithms)} on {len(samples)} images")
+        throughput = {}
+        for algorithm in algorithms:
+            remover = WatermarkRemover(algorithm=algorithm, denoise=self.denoise,
+                                       model_path=self.model_path, onnx_threads=self.onnx_threads)
+            remover.inpaint_regions(*samples[0])
+            
+            timings = {}
+            start = time.perf_counter()
+            for img, mask in samples:
+                remover.inpaint_regions(img, mask, timings)
+            elapsed = time.perf_counter() - start
+            
+            throughput[algorithm] = len(samples) / max(elapsed, 1e-6)
+            print(f"[INFO] {algorithm}: {throughput[algorithm]:.2f} images/s | {format_timings(timings)}")
+        return throughput
+    
+    def _iter_batch(self, jobs: List[Tuple[str, Optional[str], str]], workers: int,
+                    mask_template: Optional[dict] = None):
+        """Yield (image_path, output_path, error, timings) per job, in job order."""
+        workers = max(1, min(workers, len(jobs)))
+        if workers == 1:
+            for job in jobs:
+                yield _remove_job(self, job, mask_template)
+            return
+        
+        # Give each worker an equal share of the cores for OpenCV's own thread pool, so
+        # N processes x OpenCV threads does not oversubscribe the machine
+        opencv_threads = max(1, (os.cpu_count() or 1) // workers)
+        onnx_threads = self.onnx_threads or opencv_threads
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                 initargs=(self.algorithm, opencv_threads, mask_template,
+                                           self.denoise, self.model_path, onnx_threads)) as executor:
+            futures = [executor.submit(_remove_in_worker, job) for job in jobs]
+            for job, future in zip(jobs, futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Worker crashed (e.g. a decoder segfault) or the pool broke; fail
+                    # this job only, the rest of the batch is still reported
+                    result = job[0], None, str(e), {}
+                yield result
+
+
+def _remove_job(remover: WatermarkRemover, job: Tuple[str, Optional[str], str],
+                mask_template: Optional[dict] = None):
+    """Process one batch job, capturing any error instead of raising."""
+    image_path, mask_path, output_path = job
+    try:
+        result = remover.remove_watermark(image_path, mask_path=mask_path,
+                                          output_path=output_path, interactive=False,
+                                          mask_template=mask_template)
+        return image_path, result, None, remover.last_timings
+    except Exception as e:
+        return image_path, None, str(e), remover.last_timings
+
+
+def _lap(timings: dict, stage: str, start: float) -> float:
+    """Add the time since start to timings[stage] and return the current time."""
+    now = time.perf_counter()
+    timings[stage] = timings.get(stage, 0.0) + now - start
+    return now
+
+
+def format_timings(timings: dict) -> str:
+    """One-line stage breakdown, e.g. 'mask 0.21s | denoise 1.40s | inpaint 0.35s'."""
+    if not timings:
+        return "no stages timed"
+    total = sum(timings.values())
+    stages = " | ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items())
+    return f"{stages} (total {total:.2f}s)"
+
+
+# Per-process remover and batch template for pool workers, set once by _init_batch_worker
+_worker_remover = None
+_worker_mask_template = None
+
+
+def _init_batch_worker(algorithm: str, opencv_threads: int, mask_template: Optional[dict] = None,
+                       denoise: str = 'full', model_path: Optional[str] = None, onnx_threads: int = 0):
+    global _worker_remover, _worker_mask_template
+    cv2.setNumThreads(opencv_threads)
+    # The model session is created here, once per worker, and reused for all its images
+    _worker_remover = WatermarkRemover(algorithm=algorithm, denoise=denoise,
+                                       model_path=model_path, onnx_threads=onnx_threads)
+    _worker_mask_template = mask_template
+
+
+def _remove_in_worker(job: Tuple[str, Optional[str], str]):
+    return _remove_job(_worker_remover, job, _worker_mask_template)
 
 
 class WatermarkRemoverGUI:
@@ -429,6 +887,9 @@ class WatermarkRemoverGUI:
         self.brush_size = 15
         self.algorithm = tk.StringVar(value='mixed')
         self.auto_detect = tk.BooleanVar(value=True)  # Auto-detect by default
+        self.template_mode = tk.BooleanVar(value=False)  # Batch: detect once, reuse the mask
+        self.denoise_mode = tk.StringVar(value='full')
+        self.model_path = None  # ONNX inpainting model for 'AI Enhanced'
         self.remover = None
         
         # Multi-image support
@@ -440,6 +901,16 @@ class WatermarkRemoverGUI:
         self.canvas_image_id = None
         self.canvas_overlay_id = None
         
+        # Mask painting: strokes go to a display-size proxy of the image and mask and only the
+        # brush's dirty box is redrawn; the full-resolution mask gets them in _rasterize_mask
+        self.pending_strokes = []  # (x, y, radius, value) in image coordinates
+        self.paint_active = False  # Canvas shows the painting overlay built from the proxy
+        self.paint_base = None
+        self.paint_mask = None
+        self.paint_canvas_size = None
+        self.paint_dirty = None  # (x0, y0, x1, y1) on the proxy, waiting for the next frame
+        self.paint_redraw_id = None
+        
         self.setup_ui()
         
     def setup_ui(self):
@@ -555,6 +1026,24 @@ class WatermarkRemoverGUI:
         )
         auto_info.pack(anchor=tk.W, padx=10, pady=2)
         
+        template_check = tk.Checkbutton(
+            auto_frame,
+            text="📌 Same position on all images",
+            variable=self.template_mode,
+            font=('Arial', 10),
+            bg='white'
+        )
+        template_check.pack(anchor=tk.W, padx=10, pady=5)
+        
+        template_info = tk.Label(
+            auto_frame,
+            text="(Batch: detect once, reuse the mask)",
+            font=('Arial', 8),
+            bg='white',
+            fg='gray'
+        )
+        template_info.pack(anchor=tk.W, padx=10, pady=2)
+        
         # Algorithm Selection
         algo_frame = tk.LabelFrame(left_panel, text="Algorithm", font=('Arial', 10, 'bold'), bg='white')
         algo_frame.pack(pady=10, padx=20, fill=tk.X)
@@ -577,6 +1066,46 @@ class WatermarkRemoverGUI:
             )
             rb.pack(anchor=tk.W, padx=10, pady=5)
         
+        model_btn = tk.Button(
+            algo_frame,
+            text="🧠 Load AI Model (.onnx)",
+            command=self.load_model,
+            font=('Arial', 9),
+            relief=tk.FLAT,
+            cursor='hand2'
+        )
+        model_btn.pack(fill=tk.X, padx=10, pady=2)
+        
+        self.model_label = tk.Label(
+            algo_frame,
+            text="(No model: AI uses enhanced Telea)",
+            font=('Arial', 8),
+            bg='white',
+            fg='gray'
+        )
+        self.model_label.pack(anchor=tk.W, padx=10, pady=2)
+        
+        # Denoise Mode
+        denoise_frame = tk.LabelFrame(left_panel, text="Denoise", font=('Arial', 10, 'bold'), bg='white')
+        denoise_frame.pack(pady=10, padx=20, fill=tk.X)
+        
+        denoise_modes = [
+            ('Full (Best quality)', 'full'),
+            ('Around mask (Fast)', 'band'),
+            ('Off (Fastest)', 'off')
+        ]
+        
+        for text, value in denoise_modes:
+            rb = tk.Radiobutton(
+                denoise_frame,
+                text=text,
+                variable=self.denoise_mode,
+                value=value,
+                font=('Arial', 10),
+                bg='white'
+            )
+            rb.pack(anchor=tk.W, padx=10, pady=5)
+        
         # Brush Size
         brush_frame = tk.LabelFrame(left_panel, text="Brush Size", font=('Arial', 10, 'bold'), bg='white')
         brush_frame.pack(pady=10, padx=20, fill=tk.X)
@@ -795,6 +1324,27 @@ class WatermarkRemoverGUI:
         )
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
     
+    def load_model(self):
+        """Pick an ONNX inpainting model for the 'AI Enhanced' algorithm."""
+        file_path = filedialog.askopenfilename(
+            title="Select ONNX Inpainting Model",
+            filetypes=[("ONNX models", "*.onnx"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        try:
+            # Loads and caches the session, so processing reuses it
+            OnnxInpainter(file_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load model: {str(e)}")
+            return
+        
+        self.model_path = file_path
+        self.algorithm.set('ai')
+        self.model_label.config(text=f"Model: {os.path.basename(file_path)}")
+        self.status_bar.config(text=f"AI model loaded: {os.path.basename(file_path)}")
+    
     def update_brush_size(self, value):
         """Update brush size from slider."""
         self.brush_size = int(float(value))
@@ -852,6 +1402,7 @@ class WatermarkRemoverGUI:
         
         # Initialize mask
         self.mask = np.zeros(self.current_image.shape[:2], dtype=np.uint8)
+        self.pending_strokes = []
         
         # Check if this image was already processed
         if self.current_index < len(self.processed_results) and self.processed_results[self.current_index] is not None:
@@ -862,7 +1413,8 @@ class WatermarkRemoverGUI:
             self.display_image(self.current_image)
         
         # Initialize remover
-        self.remover = WatermarkRemover(algorithm=self.algorithm.get())
+        self.remover = WatermarkRemover(algorithm=self.algorithm.get(), denoise=self.denoise_mode.get(),
+                                        model_path=self.model_path)
         
         # Update navigation
         self.update_navigation()
@@ -937,6 +1489,14 @@ class WatermarkRemoverGUI:
         img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
         
         # Resize to fit canvas
+        new_width, new_height = self._fit_canvas(img.shape[:2])
+        img_resized = cv2.resize(img_rgb, (new_width, new_height))
+        
+        self._show_photo(img_resized)
+        self.paint_active = False
+    
+    def _fit_canvas(self, image_shape):
+        """Set display_scale, display_size and canvas_offset for an image of image_shape; return the size."""
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
         
@@ -945,7 +1505,7 @@ class WatermarkRemoverGUI:
             canvas_height = 600
         
         # Calculate scaling
-        img_height, img_width = img.shape[:2]
+        img_height, img_width = image_shape[:2]
         scale = min(canvas_width / img_width, canvas_height / img_height) * 0.9
         
         new_width = int(img_width * scale)
@@ -953,18 +1513,17 @@ class WatermarkRemoverGUI:
         
         self.display_scale = scale
         self.display_size = (new_width, new_height)
-        
-        img_resized = cv2.resize(img_rgb, (new_width, new_height))
-        
+        self.canvas_offset = ((canvas_width - new_width) // 2, (canvas_height - new_height) // 2)
+        return new_width, new_height
+    
+    def _show_photo(self, img_rgb):
+        """Put a display-size RGB array on the canvas at canvas_offset."""
         # Convert to PhotoImage
-        self.photo = ImageTk.PhotoImage(Image.fromarray(img_resized))
+        self.photo = ImageTk.PhotoImage(Image.fromarray(img_rgb))
         
         # Clear canvas and display
         self.canvas.delete('all')
-        x = (canvas_width - new_width) // 2
-        y = (canvas_height - new_height) // 2
-        self.canvas_offset = (x, y)
-        
+        x, y = self.canvas_offset
         self.canvas_image_id = self.canvas.create_image(x, y, anchor=tk.NW, image=self.photo)
     
     def start_draw(self, event):
@@ -980,17 +1539,7 @@ class WatermarkRemoverGUI:
     
     def draw(self, event):
         """Draw on the mask."""
-        if not self.drawing or self.current_image is None:
-            return
-        
-        # Convert canvas coordinates to image coordinates
-        x = int((event.x - self.canvas_offset[0]) / self.display_scale)
-        y = int((event.y - self.canvas_offset[1]) / self.display_scale)
-        
-        # Draw on mask
-        if 0 <= x < self.mask.shape[1] and 0 <= y < self.mask.shape[0]:
-            cv2.circle(self.mask, (x, y), self.brush_size, 255, -1)
-            self.update_canvas()
+        self._paint(event, 255)
     
     def start_erase(self, event):
         """Start erasing."""
@@ -1005,32 +1554,91 @@ class WatermarkRemoverGUI:
     
     def erase(self, event):
         """Erase from the mask."""
+        self._paint(event, 0)
+    
+    def _paint(self, event, value):
+        """Stamp the brush (value 255 = draw, 0 = erase) on the display proxy and queue the stroke."""
         if not self.drawing or self.current_image is None:
             return
+        self._ensure_paint_view()
         
         # Convert canvas coordinates to image coordinates
         x = int((event.x - self.canvas_offset[0]) / self.display_scale)
         y = int((event.y - self.canvas_offset[1]) / self.display_scale)
+        if not (0 <= x < self.mask.shape[1] and 0 <= y < self.mask.shape[0]):
+            return
+        self.pending_strokes.append((x, y, self.brush_size, value))
+        
+        # Same brush on the proxy; only its bounding box needs redrawing
+        px, py = event.x - self.canvas_offset[0], event.y - self.canvas_offset[1]
+        radius = max(1, round(self.brush_size * self.display_scale))
+        cv2.circle(self.paint_mask, (px, py), radius, value, -1)
+        
+        height, width = self.paint_mask.shape
+        box = (max(0, px - radius - 1), max(0, py - radius - 1),
+               min(width, px + radius + 2), min(height, py + radius + 2))
+        if self.paint_dirty is not None:
+            box = (min(box[0], self.paint_dirty[0]), min(box[1], self.paint_dirty[1]),
+                   max(box[2], self.paint_dirty[2]), max(box[3], self.paint_dirty[3]))
+        self.paint_dirty = box
+        
+        # Motion events arrive faster than the screen refreshes: one redraw per frame
+        if self.paint_redraw_id is None:
+            self.paint_redraw_id = self.root.after(PAINT_FRAME_MS, self._flush_paint)
+    
+    def _ensure_paint_view(self):
+        """Build the display-size image and mask proxy if the canvas isn't showing it already."""
+        canvas_size = (self.canvas.winfo_width(), self.canvas.winfo_height())
+        if self.paint_active and canvas_size == self.paint_canvas_size:
+            return
         
-        # Erase from mask
-        if 0 <= x < self.mask.shape[1] and 0 <= y < self.mask.shape[0]:
-            cv2.circle(self.mask, (x, y), self.brush_size, 0, -1)
-            self.update_canvas()
+        width, height = self._fit_canvas(self.current_image.shape[:2])
+        self.paint_base = cv2.resize(cv2.cvtColor(self.current_image, cv2.COLOR_BGR2RGB), (width, height),
+                                     interpolation=cv2.INTER_AREA)
+        self.paint_mask = cv2.resize(self.mask, (width, height), interpolation=cv2.INTER_NEAREST)
+        for x, y, radius, value in self.pending_strokes:
+            cv2.circle(self.paint_mask, (round(x * self.display_scale), round(y * self.display_scale)),
+                       max(1, round(radius * self.display_scale)), value, -1)
+        
+        self._show_photo(self._paint_overlay(self.paint_base, self.paint_mask))
+        self.paint_active = True
+        self.paint_canvas_size = canvas_size
+        self.paint_dirty = None
+    
+    def _paint_overlay(self, base, mask):
+        """Image dimmed to 70% with the mask added in green at 30%, as shown while painting."""
+        mask_colored = np.zeros_like(base)
+        mask_colored[:, :, 1] = mask  # Green channel
+        return cv2.addWeighted(base, 0.7, mask_colored, 0.3, 0)
+    
+    def _flush_paint(self):
+        """Redraw the dirty box of the painting overlay into the canvas image."""
+        self.paint_redraw_id = None
+        if self.paint_dirty is None or not self.paint_active:
+            return
+        x0, y0, x1, y1 = self.paint_dirty
+        self.paint_dirty = None
+        
+        patch = self._paint_overlay(self.paint_base[y0:y1, x0:x1], self.paint_mask[y0:y1, x0:x1])
+        patch_photo = ImageTk.PhotoImage(Image.fromarray(patch))
+        # Tk copies the patch into the displayed image in place; the rest of it is untouched
+        self.root.tk.call(str(self.photo), 'copy', str(patch_photo), '-to', x0, y0)
+    
+    def _rasterize_mask(self):
+        """Stamp the strokes painted since the last call onto the full-resolution mask and return it."""
+        for x, y, radius, value in self.pending_strokes:
+            cv2.circle(self.mask, (x, y), radius, value, -1)
+        self.pending_strokes = []
+        return self.mask
     
     def update_canvas(self):
         """Update canvas with mask overlay."""
         if self.current_image is None:
             return
         
-        # Create overlay
-        img_display = self.current_image.copy()
-        mask_colored = np.zeros_like(img_display)
-        mask_colored[:, :, 1] = self.mask  # Green channel
-        
-        img_overlay = cv2.addWeighted(img_display, 0.7, mask_colored, 0.3, 0)
-        
-        # Display
-        self.display_image(img_overlay)
+        # Rebuild the proxy from the current mask
+        self.paint_active = False
+        self._ensure_paint_view()
     
     def reset_mask(self):
         """Reset the mask."""
@@ -1039,6 +1647,7 @@ class WatermarkRemoverGUI:
             return
         
         self.mask = np.zeros(self.current_image.shape[:2], dtype=np.uint8)
+        self.pending_strokes = []
         self.display_image(self.current_image)
         self.status_bar.config(text="Mask reset | Draw watermark area")
     
@@ -1048,12 +1657,20 @@ class WatermarkRemoverGUI:
             messagebox.showwarning("Warning", "Please upload an image first!")
             return
         
+        timings = {}
+        
+        # Painted strokes only reach the full-resolution mask now
+        self._rasterize_mask()
+        
         # Use auto-detection if enabled and no manual mask drawn
         if self.auto_detect.get() and np.sum(self.mask) == 0:
             self.status_bar.config(text="Auto-detecting watermark...")
             self.root.update()
-            self.remover = WatermarkRemover(algorithm=self.algorithm.get())
+            start = time.perf_counter()
+            self.remover = WatermarkRemover(algorithm=self.algorithm.get(), denoise=self.denoise_mode.get(),
+                                            model_path=self.model_path)
             self.mask = self.remover._auto_detect_watermark(self.current_image, aggressive=True)
+            _lap(timings, 'mask', start)
         elif np.sum(self.mask) == 0:
             messagebox.showwarning("Warning", "Please draw the watermark area or enable auto-detect!")
             return
@@ -1064,16 +1681,12 @@ class WatermarkRemoverGUI:
         # Process in thread to avoid freezing
         def process_thread():
             try:
-                self.remover = WatermarkRemover(algorithm=self.algorithm.get())
-                
-                # Preprocess
-                img_preprocessed = self.remover._preprocess_image(self.current_image)
+                self.remover = WatermarkRemover(algorithm=self.algorithm.get(), denoise=self.denoise_mode.get(),
+                                                model_path=self.model_path)
                 
-                # Apply inpainting
-                result = self.remover._apply_inpainting(img_preprocessed, self.mask)
-                
-                # Postprocess
-                self.processed_image = self.remover._postprocess_image(result, self.current_image)
+                # Preprocess, inpaint and postprocess the mask regions only
+                self.processed_image = self.remover.inpaint_regions(self.current_image, self.mask, timings)
+                print(f"[INFO] Stage times: {format_timings(timings)}")
                 
                 # Store result
                 if len(self.image_queue) > 1:
@@ -1085,7 +1698,8 @@ class WatermarkRemoverGUI:
                 # Display result
                 self.root.after(0, lambda: self.display_image(self.processed_image))
                 self.root.after(0, lambda: self.status_bar.config(
-                    text=f"✓ Image {self.current_index + 1}/{len(self.image_queue)} processed!"
+                    text=f"✓ Image {self.current_index + 1}/{len(self.image_queue)} processed! "
+                         f"({format_timings(timings)})"
                 ))
                 self.root.after(0, lambda: messagebox.showinfo(
                     "Success", 
@@ -1118,10 +1732,14 @@ class WatermarkRemoverGUI:
         self.status_bar.config(text="Batch processing all images...")
         self.root.update()
         
+        use_template = self.template_mode.get()
+        
         def batch_process_thread():
             try:
                 total = len(self.image_queue)
                 self.processed_results = []
+                mask_template = None
+                stage_totals = {}
                 
                 for idx, img_path in enumerate(self.image_queue):
                     self.root.after(0, lambda i=idx, t=total: self.status_bar.config(
@@ -1134,18 +1752,22 @@ class WatermarkRemoverGUI:
                         self.processed_results.append(None)
                         continue
                     
-                    # Auto-detect watermark
-                    remover = WatermarkRemover(algorithm=self.algorithm.get())
-                    mask = remover._auto_detect_watermark(img, aggressive=True)
-                    
-                    # Preprocess
-                    img_preprocessed = remover._preprocess_image(img)
+                    remover = WatermarkRemover(algorithm=self.algorithm.get(), denoise=self.denoise_mode.get(),
+                                               model_path=self.model_path)
+                    start = time.perf_counter()
+                    if use_template and mask_template is not None:
+                        # Template mode: reuse the first image's mask, aligned to this image
+                        mask = remover.align_mask_template(mask_template, img)
+                    else:
+                        # Auto-detect watermark
+                        mask = remover._auto_detect_watermark(img, aggressive=True)
+                        if use_template:
+                            mask_template = remover.make_mask_template(mask, img)
                     
-                    # Apply inpainting
-                    result = remover._apply_inpainting(img_preprocessed, mask)
+                    _lap(stage_totals, 'mask', start)
                     
-                    # Postprocess
-                    processed = remover._postprocess_image(result, img)
+                    # Preprocess, inpaint and postprocess the mask regions only
+                    processed = remover.inpaint_regions(img, mask, stage_totals)
                     
                     self.processed_results.append(processed)
                 
@@ -1159,6 +1781,7 @@ class WatermarkRemoverGUI:
                 self.root.after(0, lambda: self.update_navigation())
                 
                 success_count = sum(1 for r in self.processed_results if r is not None)
+                print(f"[INFO] Stage totals: {format_timings(stage_totals)}")
                 self.root.after(0, lambda: messagebox.showinfo(
                     "Batch Complete",
                     f"Successfully processed {success_count}/{total} images!\n\n"
@@ -1263,8 +1886,24 @@ Examples:
   # Batch process directory
   python watermark_remover.py -b ./images -o ./output
   
+  # Batch process with 4 worker processes
+  python watermark_remover.py -b ./images -o ./output -w 4
+  
+  # Same watermark position on every image: detect once, reuse the mask
+  python watermark_remover.py -b ./images --template
+  python watermark_remover.py -b ./images --template-mask mask.png
+  
   # Use different algorithm
   python watermark_remover.py image.jpg -a mixed
+  
+  # Faster: denoise only around the watermark (or --denoise off to skip it)
+  python watermark_remover.py -b ./images --denoise band
+  
+  # Local ONNX inpainting model (LaMa-class), 4 threads
+  python watermark_remover.py image.jpg -a ai --model lama.onnx --onnx-threads 4
+  
+  # Compare throughput of Telea and the model on 20 images before a batch
+  python watermark_remover.py -b ./images -a ai --model lama.onnx --benchmark 20
         """
     )
     
@@ -1276,10 +1915,26 @@ Examples:
     parser.add_argument('-a', '--algorithm', default='telea',
                        choices=['telea', 'ns', 'mixed', 'ai'],
                        help='Inpainting algorithm (default: telea)')
+    parser.add_argument('--model', help="ONNX inpainting model for the 'ai' algorithm")
+    parser.add_argument('--onnx-threads', type=int, default=0,
+                       help='Intra-op threads for the ONNX model (default: all cores, '
+                            'or cores / workers in batch mode)')
+    parser.add_argument('--denoise', default='full', choices=list(DENOISE_MODES),
+                       help='Preprocess denoising: whole regions, only a band around the mask, '
+                            'or off (default: full)')
     parser.add_argument('-b', '--batch', help='Batch process directory')
     parser.add_argument('--mask-dir', help='Directory containing mask images for batch processing')
     parser.add_argument('-r', '--recursive', action='store_true',
                        help='Process subdirectories recursively in batch mode')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                       help='Worker processes for batch mode (default: 1)')
+    parser.add_argument('--template', action='store_true',
+                       help='Batch mode: detect the watermark once and reuse the mask for all images')
+    parser.add_argument('--template-mask',
+                       help='Batch mode: reuse this mask for all images (aligned per image)')
+    parser.add_argument('--benchmark', type=int, metavar='N',
+                       help='Batch mode: time the first N images with telea and the chosen algorithm '
+                            'instead of writing output')
     parser.add_argument('--gui', action='store_true',
                        help='Launch GUI interface (default if no arguments)')
     parser.add_argument('--no-gui', action='store_true',
@@ -1304,15 +1959,26 @@ Examples:
     
     try:
         # Initialize remover
-        remover = WatermarkRemover(algorithm=args.algorithm)
+        remover = WatermarkRemover(algorithm=args.algorithm, denoise=args.denoise,
+                                   model_path=args.model, onnx_threads=args.onnx_threads)
+        
+        # Throughput comparison
+        if args.batch and args.benchmark:
+            algorithms = tuple(dict.fromkeys(('telea', args.algorithm)))
+            remover.benchmark(args.batch, algorithms, limit=args.benchmark,
+                              mask_dir=args.mask_dir, recursive=args.recursive,
+                              template_mask=args.template_mask)
         
         # Batch mode
-        if args.batch:
+        elif args.batch:
             remover.batch_process(
                 args.batch,
                 output_dir=args.output,
                 mask_dir=args.mask_dir,
-                recursive=args.recursive
+                recursive=args.recursive,
+                workers=args.workers,
+                template=args.template,
+                template_mask=args.template_mask
             )
         
         # Single image mode
@@ -1328,6 +1994,7 @@ Examples:
                 interactive=args.interactive
             )
             
+            print(f"[INFO] Stage times: {format_timings(remover.last_timings)}")
             print(f"\n[✓] Success! Output saved to: {result}")
     
     except KeyboardInterrupt:
@@ -1340,4 +2007,5 @@ Examples:
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Batch worker pool in frozen (PyInstaller) builds
     main()